@@ -0,0 +1,134 @@
+"""
+Benchmark for the Tic Tac Toe search
+
+Runs minimax() on every reachable, unfinished 3 x 3 board for each
+engine configuration and reports the nodes visited, transposition table
+hits, deepest position searched and wall time per move, so engines can
+be compared on the same numbers and regressions spotted.
+
+    python benchmark.py [--warm] [engine ...]
+"""
+
+import argparse
+import time
+
+import tictactoe as ttt
+
+# keyword arguments to minimax() for each engine configuration; engines
+# without a cache entry get a fresh TranspositionTable (see run())
+ENGINES = {
+    "plain": dict(cache=None),
+    "cached": dict(),
+    "alphabeta": dict(cache=None, pruning=True),
+    "center": dict(cache=None, pruning=True, ordering="center"),
+    "killer": dict(cache=None, pruning=True, ordering="killer"),
+    "killer-cached": dict(pruning=True, ordering="killer"),
+}
+
+
+def reachable(size=3, k=3):
+    """
+    Returns every unfinished board that can arise from the empty board.
+    """
+    found = {}
+    finished = set()
+    state = ttt.GameState(ttt.initial_state(size), k)
+
+    def visit():
+        if state.key in found or state.key in finished:
+            return
+        if state.terminal():
+            finished.add(state.key)
+            return
+
+        found[state.key] = [list(row) for row in state.board]
+        for action in state.actions():
+            state.push(action)
+            visit()
+            state.pop()
+
+    visit()
+    return list(found.values())
+
+
+def run(engine, boards, warm=False):
+    """
+    Plays one move with engine on each of the boards and returns a list of
+    (nodes, hits, max_depth, seconds) for each move. Cached engines start
+    every move with an empty table unless warm is True, in which case one
+    table is kept for the whole run, as in a long-running player.
+    """
+    options = dict(ENGINES[engine])
+    cached = "cache" not in options
+    cache = ttt.TranspositionTable()
+    records = []
+
+    for board in boards:
+        if cached:
+            if not warm:
+                cache = ttt.TranspositionTable()
+            options["cache"] = cache
+
+        stats = ttt.SearchStats()
+        start = time.perf_counter()
+        ttt.minimax(board, stats=stats, **options)
+        seconds = time.perf_counter() - start
+        records.append((stats.nodes, stats.hits, stats.max_depth, seconds))
+
+    return records
+
+
+def percentile(values, fraction):
+    """
+    Returns the value below which fraction of the sorted values fall.
+    """
+    index = min(len(values) - 1, int(fraction * len(values)))
+    return values[index]
+
+
+def summarize(records):
+    """
+    Returns a dict of totals and per-move figures for the records of a run.
+    """
+    times = sorted(record[3] for record in records)
+    return {
+        "moves": len(records),
+        "nodes": sum(record[0] for record in records),
+        "hits": sum(record[1] for record in records),
+        "max_depth": max(record[2] for record in records),
+        "total": sum(times),
+        "median": percentile(times, 0.5),
+        "p95": percentile(times, 0.95),
+        "max": times[-1],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("engines", nargs="*", default=list(ENGINES),
+                        metavar="engine",
+                        help=f"engines to run: {', '.join(ENGINES)}")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep one transposition table for every move")
+    args = parser.parse_args()
+
+    for engine in args.engines:
+        if engine not in ENGINES:
+            parser.error(f"unknown engine {engine!r}")
+
+    boards = reachable()
+    print(f"{len(boards)} positions")
+    print(f"{'engine':<14}{'nodes':>10}{'hits':>9}{'depth':>6}"
+          f"{'total s':>9}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+
+    for engine in args.engines:
+        summary = summarize(run(engine, boards, args.warm))
+        print(f"{engine:<14}{summary['nodes']:>10}{summary['hits']:>9}"
+              f"{summary['max_depth']:>6}{summary['total']:>9.2f}"
+              f"{summary['median'] * 1000:>9.3f}"
+              f"{summary['p95'] * 1000:>9.3f}"
+              f"{summary['max'] * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
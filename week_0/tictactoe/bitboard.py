@@ -0,0 +1,288 @@
+"""
+Tic Tac Toe Player on bitboards
+
+A position is a pair of integers (x, o) whose bit i is set when X or O
+holds cell i, numbered row by row from the top left. The functions at
+the bottom of the module adapt it to the list board used by tictactoe.py,
+so runner.py can use this module in place of tictactoe.
+"""
+
+from tictactoe import SearchTimeout, symmetries
+
+X = "X"
+O = "O"
+EMPTY = None
+
+SIZE = 3
+FULL = (1 << SIZE * SIZE) - 1
+
+
+def line_masks(size=SIZE, k=SIZE):
+    """
+    Returns a tuple of masks, one per run of k cells in a row, column or
+    diagonal of a size x size board.
+    """
+    masks = []
+    directions = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+    for i in range(size):
+        for j in range(size):
+            for di, dj in directions:
+                end_i = i + (k - 1) * di
+                end_j = j + (k - 1) * dj
+                if not (0 <= end_i < size and 0 <= end_j < size):
+                    continue
+
+                mask = 0
+                for step in range(k):
+                    mask |= 1 << (i + step * di) * size + (j + step * dj)
+                masks.append(mask)
+
+    return tuple(masks)
+
+
+LINES = line_masks()
+
+
+def permuted(bits, perm):
+    """
+    Returns bits with bit i moved to bit perm[i].
+    """
+    moved = 0
+    for index, target in enumerate(perm):
+        if bits >> index & 1:
+            moved |= 1 << target
+    return moved
+
+
+# for each rotation and reflection, every 9-bit pattern after moving it
+SYMMETRIES = [[permuted(bits, perm) for bits in range(FULL + 1)]
+              for perm in symmetries(SIZE)]
+
+# values of solved positions, keyed on canonical_key(x, o)
+solved = {}
+
+
+def canonical_key(x, o):
+    """
+    Returns the smallest x << 9 | o over the rotations and reflections of
+    position (x, o), which is the same for all of them.
+    """
+    return min([table[x] << 9 | table[o] for table in SYMMETRIES])
+
+
+def cell(action):
+    """
+    Returns the bit index of action (i, j).
+    """
+    return action[0] * SIZE + action[1]
+
+
+def won(bits):
+    """
+    Returns True if bits cover any line.
+    """
+    for mask in LINES:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+def to_move(x, o):
+    """
+    Returns the player who has the next turn in position (x, o).
+    """
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def moves(x, o):
+    """
+    Returns the bit indices of the empty cells, lowest first.
+    """
+    empty = FULL & ~(x | o)
+    cells = []
+    while empty:
+        bit = empty & -empty
+        cells.append(bit.bit_length() - 1)
+        empty ^= bit
+    return cells
+
+
+def play(x, o, index):
+    """
+    Returns the position after the player to move takes cell index.
+    """
+    bit = 1 << index
+    if (x | o) & bit:
+        raise ValueError("not a valid action")
+
+    if x.bit_count() == o.bit_count():
+        return x | bit, o
+    return x, o | bit
+
+
+def value(x, o):
+    """
+    Returns the value of position (x, o) under optimal play: 1 if X wins,
+    -1 if O wins, 0 for a tie.
+    """
+    key = canonical_key(x, o)
+    try:
+        return solved[key]
+    except KeyError:
+        pass
+
+    if won(x):
+        best = 1
+    elif won(o):
+        best = -1
+    elif x | o == FULL:
+        best = 0
+    else:
+        maximizing = x.bit_count() == o.bit_count()
+        best = -1 if maximizing else 1
+        empty = FULL & ~(x | o)
+
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+
+            if maximizing:
+                best = max(best, value(x | bit, o))
+                if best == 1:
+                    break
+            else:
+                best = min(best, value(x, o | bit))
+                if best == -1:
+                    break
+
+    solved[key] = best
+    return best
+
+
+def from_board(board):
+    """
+    Returns the position (x, o) for a list board.
+    """
+    x = 0
+    o = 0
+    for i, row in enumerate(board):
+        for j, place in enumerate(row):
+            if place == X:
+                x |= 1 << i * SIZE + j
+            elif place == O:
+                o |= 1 << i * SIZE + j
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list board for position (x, o).
+    """
+    board = []
+    for i in range(SIZE):
+        row = []
+        for j in range(SIZE):
+            bit = 1 << i * SIZE + j
+            if x & bit:
+                row.append(X)
+            elif o & bit:
+                row.append(O)
+            else:
+                row.append(EMPTY)
+        board.append(row)
+    return board
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return to_board(0, 0)
+
+
+def player(board):
+    """
+    Returns player who has the next turn on a board.
+    """
+    return to_move(*from_board(board))
+
+
+def actions(board):
+    """
+    Returns set of all possible actions (i, j) available on the board.
+    """
+    return {divmod(index, SIZE) for index in moves(*from_board(board))}
+
+
+def result(board, action):
+    """
+    Returns the board that results from making move (i, j) on the board.
+    """
+    x, o = from_board(board)
+    return to_board(*play(x, o, cell(action)))
+
+
+def winner(board):
+    """
+    Returns the winner of the game, if there is one.
+    """
+    x, o = from_board(board)
+    if won(x):
+        return X
+    if won(o):
+        return O
+    return None
+
+
+def terminal(board):
+    """
+    Returns True if game is over, False otherwise.
+    """
+    x, o = from_board(board)
+    return won(x) or won(o) or x | o == FULL
+
+
+def utility(board):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    x, o = from_board(board)
+    if won(x):
+        return 1
+    if won(o):
+        return -1
+    return 0
+
+
+def minimax(board, stop=None, **options):
+    """
+    Returns the optimal action for the current player on the board:
+    the first winning move, or failing that the first drawing move,
+    counting cells row by row. Raises SearchTimeout if stop, a
+    threading.Event, is set before the search finishes. Other options of
+    tictactoe.minimax(), such as pruning or budget, are accepted and
+    ignored, since every 3 x 3 position is solved in a few milliseconds.
+    """
+    x, o = from_board(board)
+    if won(x) or won(o) or x | o == FULL:
+        return None
+
+    maximizing = to_move(x, o) == X
+    best = None
+    best_index = None
+
+    for index in moves(x, o):
+        if stop is not None and stop.is_set():
+            raise SearchTimeout()
+        score = value(*play(x, o, index))
+        if not maximizing:
+            score = -score
+
+        if best is None or score > best:
+            best = score
+            best_index = index
+            if best == 1:
+                break
+
+    return divmod(best_index, SIZE)
@@ -0,0 +1,255 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe
+
+mcts(board) returns an action like tictactoe.minimax(board), but builds a
+UCT search tree from random playouts for a fixed number of playouts or
+seconds, so its time per move does not grow with the board. Positions are
+pairs of bitboards as in bitboard.py, here for any size and k.
+
+    python mcts.py    checks that it wins against random play
+"""
+
+import math
+import os
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+import tictactoe as ttt
+from bitboard import line_masks
+
+# weight of the exploration term in the UCT formula
+EXPLORATION = math.sqrt(2)
+
+PLAYOUTS = 2000
+
+
+@lru_cache(maxsize=None)
+def geometry(size, k):
+    """
+    Returns (full, through) for a size x size board with k in a row: the
+    mask of every cell, and for each cell the masks of the lines through it.
+    """
+    masks = line_masks(size, k)
+    through = tuple(tuple(mask for mask in masks if mask >> cell & 1)
+                    for cell in range(size * size))
+    return (1 << size * size) - 1, through
+
+
+def completes(bits, cell, through):
+    """
+    Returns True if bits, which include cell, fill a line through cell.
+    """
+    for mask in through[cell]:
+        if bits & mask == mask:
+            return True
+    return False
+
+
+class Node():
+    """
+    A position in the search tree, reached by playing move. wins counts the
+    playouts through it won by the player who played move, ties as half.
+    """
+
+    __slots__ = ("move", "parent", "children", "untried", "visits", "wins",
+                 "finished")
+
+    def __init__(self, move, parent, untried, finished):
+        self.move = move
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0.0
+        self.finished = finished
+
+    def select(self):
+        """
+        Returns the child with the highest upper confidence bound.
+        """
+        log_visits = math.log(self.visits)
+        best = None
+        best_bound = -1.0
+        for child in self.children:
+            bound = (child.wins / child.visits
+                     + EXPLORATION * math.sqrt(log_visits / child.visits))
+            if bound > best_bound:
+                best = child
+                best_bound = bound
+        return best
+
+
+def cells(bits):
+    """
+    Returns the indices of the set bits.
+    """
+    found = []
+    while bits:
+        bit = bits & -bits
+        found.append(bit.bit_length() - 1)
+        bits ^= bit
+    return found
+
+
+def search(x, o, size, k, playouts=None, budget=None, seed=None):
+    """
+    Runs UCT from position (x, o), X to move if both have as many marks,
+    and returns a dict of root visit counts and wins per cell.
+    """
+    full, through = geometry(size, k)
+    rng = random.Random(seed)
+    deadline = None if budget is None else time.monotonic() + budget
+    if playouts is None and budget is None:
+        playouts = PLAYOUTS
+
+    x_to_move = x.bit_count() == o.bit_count()
+    root = Node(None, None, cells(full & ~(x | o)), None)
+    rng.shuffle(root.untried)
+    done = 0
+
+    while playouts is None or done < playouts:
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        done += 1
+
+        node = root
+        mover, other = (x, o) if x_to_move else (o, x)
+
+        # select down to a node with moves left to try
+        while not node.untried and node.children:
+            node = node.select()
+            mover, other = other, mover | 1 << node.move
+
+        # expand one of them
+        if node.untried and node.finished is None:
+            move = node.untried.pop()
+            mover |= 1 << move
+            if completes(mover, move, through):
+                finished = 1
+            elif mover | other == full:
+                finished = 0
+            else:
+                finished = None
+            untried = cells(full & ~(mover | other))
+            rng.shuffle(untried)
+            child = Node(move, node, untried, finished)
+            node.children.append(child)
+            node = child
+            mover, other = other, mover
+
+        # play out at random; outcome is 1 if the player who moved into
+        # node wins, -1 if they lose and 0 for a tie
+        if node.finished is not None:
+            outcome = node.finished
+        else:
+            empty = node.untried[:]
+            rng.shuffle(empty)
+            outcome = 0
+            # turn is 1 after a move by the player who moved into node,
+            # -1 after one by their opponent, who moves first here
+            turn = 1
+            for move in empty:
+                mover |= 1 << move
+                turn = -turn
+                if completes(mover, move, through):
+                    outcome = turn
+                    break
+                mover, other = other, mover
+
+        # back up, flipping the point of view at each level
+        while node is not None:
+            node.visits += 1
+            if outcome > 0:
+                node.wins += 1
+            elif outcome == 0:
+                node.wins += 0.5
+            outcome = -outcome
+            node = node.parent
+
+    return {child.move: (child.visits, child.wins) for child in root.children}
+
+
+def mcts(board, k=3, playouts=None, budget=None, processes=1, seed=None):
+    """
+    Returns the action for the current player on the board that UCT visits
+    most, after playouts random games (or PLAYOUTS if neither limit is
+    set) or budget seconds, whichever comes first. With processes > 1, or
+    None for one per CPU, each process grows its own tree on its share of
+    the playouts and their root visit counts are added together.
+    """
+    if ttt.terminal(board, k):
+        return None
+
+    size = len(board)
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, place in enumerate(row):
+            if place == ttt.X:
+                x |= 1 << i * size + j
+            elif place == ttt.O:
+                o |= 1 << i * size + j
+
+    if processes == 1:
+        results = [search(x, o, size, k, playouts, budget, seed)]
+    else:
+        workers = processes or os.cpu_count() or 1
+        share = None if playouts is None else -(-playouts // workers)
+        if share is None and budget is None:
+            share = -(-PLAYOUTS // workers)
+        base = random.Random(seed).randrange(2 ** 32)
+        with ProcessPoolExecutor(workers) as pool:
+            futures = [pool.submit(search, x, o, size, k, share, budget,
+                                   base + worker)
+                       for worker in range(workers)]
+            results = [future.result() for future in futures]
+
+    totals = {}
+    for result in results:
+        for move, (visits, wins) in result.items():
+            seen, won = totals.get(move, (0, 0.0))
+            totals[move] = (seen + visits, won + wins)
+
+    move = max(totals, key=lambda move: totals[move])
+    return divmod(move, size)
+
+
+def check(games=10, playouts=300, seed=0):
+    """
+    Checks that UCT takes an immediate win and beats a random player as
+    both X and O on a 5 x 5 board with four in a row, where the playouts
+    rather than the rules decide every move. Raises AssertionError if
+    not.
+    """
+    size, k = 5, 4
+
+    # X to move with three in a row on the top row and room to finish it
+    board = ttt.initial_state(size)
+    for j in range(3):
+        board[0][j] = ttt.X
+    board[4][0] = board[4][2] = board[4][4] = ttt.O
+    move = mcts(board, k, playouts=playouts, seed=seed)
+    assert move == (0, 3), f"missed the win at (0, 3), played {move}"
+
+    rng = random.Random(seed)
+    for side in (ttt.X, ttt.O):
+        wins = 0
+        for game in range(games):
+            board = ttt.initial_state(size)
+            while not ttt.terminal(board, k):
+                if ttt.player(board) == side:
+                    action = mcts(board, k, playouts=playouts,
+                                  seed=seed + game)
+                else:
+                    action = rng.choice(sorted(ttt.actions(board)))
+                board = ttt.result(board, action)
+            wins += ttt.winner(board, k) == side
+        assert wins > games * 0.8, (
+            f"won {wins} of {games} games as {side} against random play")
+
+
+if __name__ == "__main__":
+    check()
+    print("ok")
@@ -0,0 +1,197 @@
+"""
+Perfect-play table for 3 x 3 Tic Tac Toe
+
+build() solves every position reachable from the empty board once and
+writes a table with one byte per canonical() board: the move minimax()
+would play there and the value of the board. Rotations and reflections
+of a board share its entry, so the table holds about an eighth of the
+reachable positions. lookup() memory-maps the table the first time it is
+needed, building it if the file is missing, so each move afterwards
+costs a binary search over the mapped file.
+
+Run this module to (re)build the table:
+
+    python perfect.py [path]
+"""
+
+import mmap
+import os
+import struct
+import sys
+
+from array import array
+from bisect import bisect_left
+
+import tictactoe as ttt
+
+PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "perfect.bin")
+MAGIC = b"TTT2"
+
+# after MAGIC the file holds the number of entries n as a 32-bit integer,
+# then the n sorted indices of canonical boards as 16-bit integers, all
+# little-endian, then one byte per board holding the cell of the move
+# (0-8, or NO_MOVE when the game is over) in its low four bits and
+# value + 1 above them
+HEADER = struct.Struct("<I")
+NO_MOVE = 15
+
+# the mapped file and views of its indices and entries, once loaded
+table = None
+indices = None
+entries = None
+
+
+# board_key() of the empty 3 x 3 board, the part of every key that only
+# records the size and k, so subtracting it leaves the cell digits
+OFFSET = ttt.board_key(ttt.initial_state())
+
+
+def index(board):
+    """
+    Returns the position of the board in the table: its ttt.board_key()
+    without the size and k.
+    """
+    return ttt.board_key(board) - OFFSET
+
+
+def canonical_index(board):
+    """
+    Returns (position, t): the index of ttt.canonical(board) and the
+    number of the symmetry that turns the board into it.
+    """
+    canonical, t = ttt.canonical(board)
+    return index(canonical), t
+
+
+def encode(action, value):
+    """
+    Returns the table byte for playing action on a board with value.
+    """
+    cell = NO_MOVE if action is None else action[0] * 3 + action[1]
+    return (value + 1) << 4 | cell
+
+
+def decode(entry):
+    """
+    Returns (action, value) for a table byte.
+    """
+    cell = entry & 0x0F
+    action = None if cell == NO_MOVE else divmod(cell, 3)
+    return action, (entry >> 4) - 1
+
+
+def build(path=PATH):
+    """
+    Solves every reachable position and writes the table to path,
+    returning the number of positions stored.
+    """
+    solved = {}
+    state = ttt.GameState(ttt.initial_state())
+
+    # every child of a variant of a board is a variant of a child of the
+    # canonical board, so only canonical boards need to be expanded
+    def visit():
+        board, _ = ttt.canonical(state.board)
+        position = index(board)
+        if position in solved:
+            return
+
+        if state.terminal():
+            solved[position] = encode(None, state.utility())
+            return
+
+        solved[position] = encode(ttt.minimax(board), ttt.minimax2(board))
+        for action in state.actions():
+            state.push(action)
+            visit()
+            state.pop()
+
+    visit()
+    positions = sorted(solved)
+
+    # write next to the final file and swap it in, so a reader never
+    # maps a half-written table
+    partial = path + ".tmp"
+    with open(partial, "wb") as f:
+        f.write(MAGIC)
+        f.write(HEADER.pack(len(positions)))
+        packed = array("H", positions)
+        if sys.byteorder == "big":
+            packed.byteswap()
+        f.write(packed.tobytes())
+        f.write(bytes(solved[position] for position in positions))
+    os.replace(partial, path)
+    return len(positions)
+
+
+def load(path=PATH):
+    """
+    Memory-maps the table at path, building it first if it is missing.
+    """
+    global table, indices, entries
+    if not os.path.exists(path):
+        build(path)
+
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    start = len(MAGIC) + HEADER.size
+    if mapped[:len(MAGIC)] != MAGIC:
+        mapped.close()
+        raise ValueError(f"{path} is not a perfect-play table")
+
+    count, = HEADER.unpack_from(mapped, len(MAGIC))
+    if len(mapped) != start + 3 * count:
+        mapped.close()
+        raise ValueError(f"{path} is truncated")
+
+    view = memoryview(mapped)
+    indices = view[start:start + 2 * count].cast("H")
+    if sys.byteorder == "big":
+        # the file is little-endian: read the indices into swapped copies
+        indices = array("H", indices)
+        indices.byteswap()
+    entries = view[start + 2 * count:]
+    table = mapped
+    return table
+
+
+def lookup(board):
+    """
+    Returns (action, value) for the board: an optimal action, the one
+    minimax() plays on the canonical form of the board, and the value of
+    the board under optimal play. Boards that cannot arise in a game are
+    searched instead.
+    """
+    if len(board) != 3:
+        raise ValueError("the table only covers 3 x 3 boards")
+
+    if table is None:
+        load()
+
+    position, t = canonical_index(board)
+    found = bisect_left(indices, position)
+
+    if found == len(indices) or indices[found] != position:
+        board = ttt.transform(board, t)
+        if ttt.terminal(board):
+            return None, ttt.utility(board)
+        action, value = ttt.minimax(board), ttt.minimax2(board)
+    else:
+        action, value = decode(entries[found])
+
+    if action is not None:
+        action = ttt.restore_action(action, t)
+    return action, value
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    """
+    return lookup(board)[0]
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else PATH
+    print(f"Stored {build(path)} positions in {path}")
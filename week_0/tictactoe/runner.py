@@ -1,5 +1,6 @@
 import pygame
 import sys
+import threading
 import time
 
 import tictactoe as ttt
@@ -16,17 +17,73 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+clock = pygame.time.Clock()
+
+# Seconds the computer may think before playing its best move so far,
+# or None to always search to the end of the game
+ai_deadline = None
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+
+# The computer moves on a worker thread so the window keeps drawing
+worker = None
+cancel = None
+outcome = []
+thinking_since = 0
+
+# Why the computer could not move, shown until the next game
+failure = None
+
+
+def think(board, cancel, outcome):
+    """
+    Computes the computer's move on board and appends ("move", move) to
+    outcome, unless cancel is set first, or ("error", message) if the
+    search fails.
+    """
+    try:
+        if ai_deadline is None:
+            move = ttt.minimax(board, stop=cancel)
+        else:
+            move = ttt.minimax(board, pruning=True, ordering="killer",
+                               budget=ai_deadline, stop=cancel)
+    except ttt.SearchTimeout:
+        if not cancel.is_set():
+            outcome.append(("error", "search stopped without a move"))
+        return
+    except Exception as error:
+        outcome.append(("error", f"{type(error).__name__}: {error}"))
+        return
+
+    if not cancel.is_set():
+        outcome.append(("move", move))
+
+
+def stop_thinking():
+    """
+    Cancels the computer's move, if it is thinking.
+    """
+    global worker
+    if worker is not None:
+        cancel.set()
+        worker = None
+
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            stop_thinking()
             sys.exit()
 
+        # Escape goes back to choosing a player at any time
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+            stop_thinking()
+            user = None
+            board = ttt.initial_state()
+            failure = None
+
     screen.fill(black)
 
     # Let user choose a player.
@@ -99,6 +156,8 @@ while True:
                 title = f"Game Over: Tie."
             else:
                 title = f"Game Over: {winner} wins."
+        elif failure is not None:
+            title = "Computer failed to move."
         elif user == player:
             title = f"Play as {user}"
         else:
@@ -108,15 +167,27 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+        # Check for AI move, playing it no sooner than half a second in
+        if user != player and not game_over and failure is None:
+            if worker is None:
+                cancel = threading.Event()
+                outcome = []
+                worker = threading.Thread(
+                    target=think, args=(board, cancel, outcome), daemon=True
+                )
+                worker.start()
+                thinking_since = time.time()
+            elif outcome and outcome[0][0] == "error":
+                failure = outcome[0][1]
+                print(f"Computer failed to move: {failure}", file=sys.stderr)
+                worker = None
+            elif outcome and time.time() - thinking_since >= 0.5:
+                board = ttt.result(board, outcome[0][1])
+                worker = None
+            elif not outcome and not worker.is_alive():
+                # the thread ended without a move or an error to show
+                failure = "the search ended without a move"
+                worker = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -139,8 +210,10 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    stop_thinking()
                     user = None
                     board = ttt.initial_state()
-                    ai_turn = False
+                    failure = None
 
     pygame.display.flip()
+    clock.tick(30)
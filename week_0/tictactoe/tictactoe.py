@@ -1,22 +1,59 @@
 """
 Tic Tac Toe Player
+
+The board is a list of rows and may be any size; a player wins with k
+marks in a row, column or diagonal, three unless stated otherwise.
 """
 
 import math
-import copy
+import os
+import time
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache, partial
 
 X = "X"
 O = "O"
 EMPTY = None
 
 
-def initial_state():
+def initial_state(size=3):
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * size for _ in range(size)]
+
+
+@lru_cache(maxsize=None)
+def lines(size=3, k=3):
+    """
+    Returns every run of k cells in a row, column or diagonal of a
+    size x size board, as a tuple of tuples of (i, j) cells.
+    """
+    found = []
+    for di, dj in [(0, 1), (1, 0), (1, 1), (1, -1)]:
+        for i in range(size):
+            for j in range(size):
+                end_i = i + (k - 1) * di
+                end_j = j + (k - 1) * dj
+                if 0 <= end_i < size and 0 <= end_j < size:
+                    found.append(tuple((i + step * di, j + step * dj)
+                                       for step in range(k)))
+    return tuple(found)
+
+
+@lru_cache(maxsize=None)
+def cell_lines(size=3, k=3):
+    """
+    Returns a dict mapping each cell (i, j) to the indices into
+    lines(size, k) of the lines through it.
+    """
+    through = {(i, j): [] for i in range(size) for j in range(size)}
+    for n, line in enumerate(lines(size, k)):
+        for cell in line:
+            through[cell].append(n)
+    return through
 
 
 def player(board):
@@ -38,7 +75,7 @@ def player(board):
             elif place == EMPTY:
                 empty += 1
                 
-    if empty == 9:
+    if empty == len(board) * len(board):
         return X
         
     if x == o:
@@ -70,12 +107,13 @@ def result(board, action):
     
     row = action[0]
     place = action[1]
-    result = copy.deepcopy(board)
     
-    if action not in actions(board):
+    if not (0 <= row < len(board) and 0 <= place < len(board[row])
+            and board[row][place] == EMPTY):
         raise ValueError("not a valid action")
         
     else:
+        result = [list(r) for r in board]
         if player(board) == X:
             result[row][place] = X
             
@@ -89,180 +127,731 @@ def result(board, action):
     return result
     
 
-def winner(board):
+def winner(board, k=3):
     """
     Returns the winner of the game, if there is one.
     """
-    x = 0 
-    o = 0
-    
-    for row in board:
-        for place in row:
-            if place == X:
-                x += 1
-            if place == O:
-                o += 1
-                
-            if x == 3:
-                return X
-            elif o == 3:
-                return O
-        else:
-            x = 0
-            o = 0
-                
-    for i in range(len(board)):
-        for row in board:
-            if row[i] == X:
-                x += 1
-            if row[i] == O:
-                o += 1
-                
-            if x == 3:
-                return X
-            elif o == 3:
-                return O
-        else:
-            x = 0
-            o = 0
-    
-    if board[0][0] == X and board[1][1] == X and board[2][2] == X:
-        return X
-    
-    if board[0][2] == X and board[1][1] == X and board[2][0] == X:
-        return X
-            
-    if board[0][0] == O and board[1][1] == O and board[2][2] == O:
-        return O
-    
-    if board[0][2] == O and board[1][1] == O and board[2][0] == O:
-        return O 
-    
+    for line in lines(len(board), k):
+        i, j = line[0]
+        first = board[i][j]
+        if first != EMPTY and all(board[i][j] == first for i, j in line):
+            return first
+
     return None
 
 
-def terminal(board):
+def terminal(board, k=3):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) == X or winner(board) == O:
+    if winner(board, k) is not None:
         return True
         
-    empty = 0
-    
     for row in board:
         for place in row:
             if place == EMPTY:
-                empty += 1
+                return False
     
-    if empty == 0:
-        return True
-        
-    return False
+    return True
 
 
-def utility(board):
+def utility(board, k=3):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
+    won = winner(board, k)
+    if won == X:
         return 1
     
-    elif winner(board) == O:
+    elif won == O:
         return -1 
     
     else:
         return 0
         
 
-def minimax_helper_X(board):
-    
-    if terminal(board) == True:
-        return utility(board)
-    
-    high = -1
-    for action in actions(board):
-        
-        next_board = result(board, action)
-        
-        if minimax2(next_board) > high:
-            high = minimax2(next_board)
-            
-    return high 
-        
-                     
-def minimax_helper_O(board):
-    
-    if terminal(board) == True:
-        return utility(board)
-    
-    low = 1
-    for action in actions(board):
-        
-        next_board = result(board, action)
-        
-        if minimax2(next_board) < low:
-            low = minimax2(next_board)
-            
-    return low 
-        
+class TranspositionTable():
+    """
+    Bounded cache of solved positions keyed on the board_key() of their
+    canonical() form.
 
-def minimax2(board):
-    
-    if player(board) == X:
-        return minimax_helper_X(board)
-            
-    if player(board) == O:
-        return minimax_helper_O(board)
-    
-    
-def minimax(board):
+    Once maxsize entries are stored, the least recently used entry is
+    evicted. hits and misses count lookups since the last clear().
     """
-    Returns the optimal action for the current player on the board.
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        """
+        Returns the value stored for key, or None if it is not cached.
+        """
+        try:
+            value = self.entries[key]
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Stores value for key, evicting the oldest entry if the table is full.
+        """
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# shared by every search unless a caller passes its own table (or None)
+transpositions = TranspositionTable()
+
+
+def board_key(board, k=3):
     """
-    if terminal(board) == True:
-        return None
-        
-    if player(board) == X:
-        # to speed up the first move 
-        empty = 0
-    
-        for row in board:
-            for place in row:
+    Returns a hashable encoding of the board: the base-3 number whose
+    digits are the cells row by row, 0 for EMPTY, 1 for X and 2 for O,
+    plus a multiple of 3 ** cells recording the board size and k so
+    boards of different games never share a key.
+    """
+    key = 0
+    for row in reversed(board):
+        for place in reversed(row):
+            key = key * 3 + (1 if place == X else 2 if place == O else 0)
+    return key + (len(board) * 64 + k) * 3 ** (len(board) * len(board))
+
+
+@lru_cache(maxsize=None)
+def symmetries(size=3):
+    """
+    Returns the eight rotations and reflections of a size x size board,
+    each as a tuple mapping cell number i * size + j to the number of the
+    cell it moves to. The first is the identity.
+    """
+    last = size - 1
+    moves = [lambda i, j: (i, j),
+             lambda i, j: (j, last - i),
+             lambda i, j: (last - i, last - j),
+             lambda i, j: (last - j, i),
+             lambda i, j: (i, last - j),
+             lambda i, j: (last - i, j),
+             lambda i, j: (j, i),
+             lambda i, j: (last - j, last - i)]
+
+    found = []
+    for move in moves:
+        perm = []
+        for i in range(size):
+            for j in range(size):
+                ti, tj = move(i, j)
+                perm.append(ti * size + tj)
+        found.append(tuple(perm))
+    return tuple(found)
+
+
+def transform(board, t):
+    """
+    Returns a copy of the board moved by symmetry number t.
+    """
+    size = len(board)
+    perm = symmetries(size)[t]
+    moved = [[EMPTY] * size for _ in range(size)]
+    for i, row in enumerate(board):
+        for j, place in enumerate(row):
+            ti, tj = divmod(perm[i * size + j], size)
+            moved[ti][tj] = place
+    return moved
+
+
+def transform_action(action, t, size=3):
+    """
+    Returns where symmetry number t moves action (i, j).
+    """
+    return divmod(symmetries(size)[t][action[0] * size + action[1]], size)
+
+
+def restore_action(action, t, size=3):
+    """
+    Returns the action that symmetry number t moves to action (i, j),
+    undoing transform_action().
+    """
+    perm = symmetries(size)[t]
+    return divmod(perm.index(action[0] * size + action[1]), size)
+
+
+def canonical(board, k=3):
+    """
+    Returns (canonical, t): the rotation or reflection of the board with
+    the smallest board_key(), shared by all eight variants of the board,
+    and the number t of the symmetry that turns the board into it.
+    """
+    best = None
+    for t in range(8):
+        moved = transform(board, t)
+        key = board_key(moved, k)
+        if best is None or key < best[0]:
+            best = (key, moved, t)
+    return best[1], best[2]
+
+
+# points for a line holding count marks of one player and none of the
+# other; a heuristic score only compares positions searched to a depth
+LINE_POINTS = [0] + [4 ** count for count in range(1, 32)]
+
+
+class GameState():
+    """
+    Mutable copy of a board for searching without allocating new boards.
+
+    push(action) plays a move and pop() takes back the last one. The
+    side to move, number of empty cells, marks per line, a heuristic
+    score and the board_key() of all eight symmetries of the board are
+    kept up to date, so player(), winner(), terminal(), evaluate() and
+    canonical_key() are O(1).
+    """
+
+    def __init__(self, board, k=3):
+        self.size = len(board)
+        self.k = k
+        self.lines = lines(self.size, k)
+        self.cell_lines = cell_lines(self.size, k)
+        self.board = [[EMPTY] * self.size for _ in range(self.size)]
+        self.keys = [board_key(self.board, k)] * 8
+        self.history = []
+        self.x_lines = [0] * len(self.lines)
+        self.o_lines = [0] * len(self.lines)
+        self.x_wins = 0
+        self.o_wins = 0
+        self.x = 0
+        self.o = 0
+        self.empty = self.size * self.size
+        self.score = 0
+        # what a mark on each cell adds to each key, per unit of its digit
+        perms = symmetries(self.size)
+        self.weights = [[tuple(3 ** perm[i * self.size + j] for perm in perms)
+                         for j in range(self.size)]
+                        for i in range(self.size)]
+
+        for i, row in enumerate(board):
+            for j, place in enumerate(row):
+                if place != EMPTY:
+                    self._place((i, j), place)
+
+    def _place(self, action, mark):
+        """
+        Puts mark on the empty cell action and updates the counters.
+        """
+        i, j = action
+        self.board[i][j] = mark
+        self.empty -= 1
+
+        if mark == X:
+            self.x += 1
+            self.x_wins += self._count(action, self.x_lines, 1)
+            self._shift_keys(self.weights[i][j], 1)
+        else:
+            self.o += 1
+            self.o_wins += self._count(action, self.o_lines, 1)
+            self._shift_keys(self.weights[i][j], 2)
+
+    def _shift_keys(self, weights, digit):
+        """
+        Adds digit times each of weights to the matching key.
+        """
+        keys = self.keys
+        for t, weight in enumerate(weights):
+            keys[t] += digit * weight
+
+    @property
+    def key(self):
+        """
+        The board_key() of the board.
+        """
+        return self.keys[0]
+
+    def canonical_key(self):
+        """
+        Returns the board_key() of canonical(board), which is the same for
+        all eight rotations and reflections of the board.
+        """
+        return min(self.keys)
+
+    def _count(self, cell, counts, step):
+        """
+        Adds step to counts, self.x_lines or self.o_lines, for every line
+        through cell, updating the score, and returns the change in the
+        number of full lines.
+        """
+        k = self.k
+        x_lines = self.x_lines
+        o_lines = self.o_lines
+        score = self.score
+        full = 0
+
+        for n in self.cell_lines[cell]:
+            x = x_lines[n]
+            o = o_lines[n]
+            score -= (0 if o else LINE_POINTS[x]) - (0 if x else LINE_POINTS[o])
+
+            if counts[n] == k:
+                full -= 1
+            counts[n] += step
+            if counts[n] == k:
+                full += 1
+
+            x = x_lines[n]
+            o = o_lines[n]
+            score += (0 if o else LINE_POINTS[x]) - (0 if x else LINE_POINTS[o])
+
+        self.score = score
+        return full
+
+    def player(self):
+        """
+        Returns player who has the next turn.
+        """
+        return X if self.x == self.o else O
+
+    def actions(self):
+        """
+        Returns a list of the empty cells (i, j), row by row.
+        """
+        return [(i, j) for i, row in enumerate(self.board)
+                for j, place in enumerate(row) if place == EMPTY]
+
+    def local_actions(self):
+        """
+        Returns the empty cells next to an occupied one, or every empty
+        cell if the board is empty.
+        """
+        size = self.size
+        if self.empty == size * size:
+            return self.actions()
+
+        board = self.board
+        near = set()
+        for i, row in enumerate(board):
+            for j, place in enumerate(row):
                 if place == EMPTY:
-                    empty += 1
-                    
-        if empty == 9:
-            return (0, 1)
-        
-        help_list = []
-        for action in actions(board):
-            
-            next_board = result(board, action)
-            help_list.append((minimax2(next_board), action))
-            
-        for action in range(len(actions(board))):
-            if help_list[action][0] == 1:
-                return help_list[action][1]
-                
-        for action in range(len(actions(board))):
-            if help_list[action][0] == 0:
-                return help_list[action][1]        
-        
-    if player(board) == O:
-        
-        help_list = []
-        for action in actions(board):
-            
-            next_board = result(board, action)
-            help_list.append((minimax2(next_board), action))
-        
-        for action in range(len(actions(board))):
-            if help_list[action][0] == -1:
-                return help_list[action][1] 
-                
-        for action in range(len(actions(board))):
-            if help_list[action][0] == 0:
-                return help_list[action][1] 
+                    continue
+                for ni in range(max(i - 1, 0), min(i + 2, size)):
+                    for nj in range(max(j - 1, 0), min(j + 2, size)):
+                        if board[ni][nj] == EMPTY:
+                            near.add((ni, nj))
+        return sorted(near)
+
+    def winner(self):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        if self.x_wins:
+            return X
+        if self.o_wins:
+            return O
+        return None
+
+    def terminal(self):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return bool(self.x_wins or self.o_wins or not self.empty)
+
+    def utility(self):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        if self.x_wins:
+            return 1
+        if self.o_wins:
+            return -1
+        return 0
+
+    def evaluate(self):
+        """
+        Returns a heuristic value strictly between -1 and 1 for an
+        unfinished game, positive when X has more open lines.
+        """
+        return self.score / (abs(self.score) + 64)
+
+    def push(self, action):
+        """
+        Plays move (i, j) for the player to move.
+        """
+        i, j = action
+        if i < 0 or j < 0 or self.board[i][j] != EMPTY:
+            raise ValueError("not a valid action")
+
+        self._place(action, self.player())
+        self.history.append(action)
+
+    def pop(self):
+        """
+        Takes back the last move pushed and returns it.
+        """
+        action = self.history.pop()
+        i, j = action
+        weights = self.weights[i][j]
+
+        if self.board[i][j] == X:
+            self.x -= 1
+            self.x_wins += self._count(action, self.x_lines, -1)
+            self._shift_keys(weights, -1)
+        else:
+            self.o -= 1
+            self.o_wins += self._count(action, self.o_lines, -1)
+            self._shift_keys(weights, -2)
+
+        self.board[i][j] = EMPTY
+        self.empty += 1
+        return action
+
+
+class SearchTimeout(Exception):
+    """
+    Raised inside a search when its deadline has passed or it was stopped.
+    """
+
+
+# transposition table entry flags: the stored value is exact, or only a
+# lower/upper bound because alpha-beta cut the search short
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+
+@lru_cache(maxsize=None)
+def center_first(size=3):
+    """
+    Returns a dict ranking each cell by its distance from the center,
+    corners of a ring before its edges: on a 3 x 3 board the center,
+    then corners, then edges.
+    """
+    middle = (size - 1) / 2
+    rings = {}
+    for i in range(size):
+        for j in range(size):
+            di = abs(i - middle)
+            dj = abs(j - middle)
+            rings[(i, j)] = (max(di, dj), -(di + dj))
+    order = sorted(set(rings.values()))
+    return {cell: order.index(ring) for cell, ring in rings.items()}
+
+
+ORDERINGS = (None, "center", "killer")
+
+
+class SearchStats():
+    """
+    Counters filled in by a search. nodes is the number of positions
+    visited, hits the number answered from the transposition table and
+    max_depth the most moves ahead of the searched board a position was.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.hits = 0
+        self.max_depth = 0
+
+    def __repr__(self):
+        return (f"SearchStats(nodes={self.nodes}, hits={self.hits}, "
+                f"max_depth={self.max_depth})")
+
+
+class Search():
+    """
+    Minimax search over a GameState, optionally with alpha-beta pruning.
+
+    ordering is None to try moves in actions() order, "center" to try the
+    center, then corners, then edges, or "killer" to try the last move that
+    caused a cutoff at the same depth before the center-first order.
+    If deadline, a time.monotonic() value, passes during a search, or
+    stop, a threading.Event, is set, value() raises SearchTimeout. local
+    only searches cells next to occupied ones, which suits large boards
+    searched to a limited depth. on_expand, if given, is called with the
+    state and its ply each time a position's moves are about to be
+    searched.
+    """
+
+    def __init__(self, cache=transpositions, pruning=False, ordering=None,
+                 stats=None, deadline=None, local=False, stop=None,
+                 on_expand=None):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"unknown move ordering {ordering!r}")
+
+        self.cache = cache
+        self.pruning = pruning
+        self.ordering = ordering
+        self.stats = stats if stats is not None else SearchStats()
+        self.deadline = deadline
+        self.local = local
+        self.stop = stop
+        self.on_expand = on_expand
+        self.killers = {}
+
+    def ordered_actions(self, state, ply):
+        """
+        Returns the actions in state in the order they should be searched.
+        """
+        moves = state.local_actions() if self.local else state.actions()
+        if self.ordering is None:
+            return moves
+
+        moves.sort(key=center_first(state.size).get)
+        killer = self.killers.get(ply)
+        if self.ordering == "killer" and killer in moves:
+            moves.remove(killer)
+            moves.insert(0, killer)
+
+        return moves
+
+    def value(self, state, alpha=-1, beta=1, ply=0, depth=None):
+        """
+        Returns the value of state: 1 if X wins, -1 if O wins, 0 for a tie.
+        With pruning, a value <= alpha or >= beta is only a bound. If depth
+        is given, games unfinished after that many moves are scored with
+        state.evaluate(). state is back in its original position on return.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if ply > stats.max_depth:
+            stats.max_depth = ply
+
+        if not stats.nodes % 1024 and (
+                (self.deadline is not None and time.monotonic() > self.deadline)
+                or (self.stop is not None and self.stop.is_set())):
+            raise SearchTimeout()
+
+        if state.terminal():
+            return state.utility()
+
+        # searching as deep as the empty cells allow is searching to the end
+        if depth is None or depth > state.empty:
+            depth = state.empty
+        if depth == 0:
+            return state.evaluate()
+
+        cache = self.cache
+        if cache is not None:
+            # rotations and reflections share a value, so share an entry
+            key = state.canonical_key()
+            entry = cache.get(key)
+            if entry is not None:
+                value, flag, searched = entry
+                if searched >= depth and (
+                        flag == EXACT
+                        or (flag == LOWER and value >= beta)
+                        or (flag == UPPER and value <= alpha)):
+                    stats.hits += 1
+                    return value
+
+        if self.on_expand is not None:
+            self.on_expand(state, ply)
+
+        maximizing = state.player() == X
+        low, high = alpha, beta
+        best = -1 if maximizing else 1
+
+        for action in self.ordered_actions(state, ply):
+            state.push(action)
+            try:
+                value = self.value(state, low, high, ply + 1, depth - 1)
+            finally:
+                state.pop()
+
+            if maximizing:
+                if value > best:
+                    best = value
+                if self.pruning and best > low:
+                    low = best
+            else:
+                if value < best:
+                    best = value
+                if self.pruning and best < high:
+                    high = best
+
+            if self.pruning and low >= high:
+                self.killers[ply] = action
+                break
+
+        if cache is not None:
+            if not self.pruning:
+                flag = EXACT
+            elif best <= alpha:
+                flag = UPPER
+            elif best >= beta:
+                flag = LOWER
+            else:
+                flag = EXACT
+            cache.put(key, (best, flag, depth))
+
+        return best
+
+    def best_action(self, state, moves, depth=None):
+        """
+        Returns (action, value) for the first of moves with the best value
+        for the player to move in state, stopping at the first win.
+        Children are searched depth - 1 moves deep, or to the end if depth
+        is None.
+        """
+        maximizing = state.player() == X
+        win = 1 if maximizing else -1
+        best = -win
+        best_action = None
+        child = None if depth is None else depth - 1
+
+        for action in moves:
+            state.push(action)
+            try:
+                if not self.pruning:
+                    value = self.value(state, ply=1, depth=child)
+                elif maximizing:
+                    value = self.value(state, best, 1, 1, child)
+                else:
+                    value = self.value(state, -1, best, 1, child)
+            finally:
+                state.pop()
+
+            if value == win:
+                return action, value
+
+            if (best_action is None
+                    or (maximizing and value > best)
+                    or (not maximizing and value < best)):
+                best = value
+                best_action = action
+
+        return best_action, best
+
+
+def minimax2(board, cache=transpositions, k=3):
+    """
+    Returns the value of the board under optimal play: 1 if X wins,
+    -1 if O wins, 0 for a tie. Solved positions are stored in cache
+    unless it is None.
+    """
+    return Search(cache).value(GameState(board, k))
+
+
+def minimax(board, cache=transpositions, pruning=False, ordering=None,
+            stats=None, k=3, depth=None, budget=None, stop=None,
+            on_expand=None):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Positions are looked up in and added to cache, a TranspositionTable;
+    pass cache=None to search without one. pruning enables alpha-beta
+    with the given move ordering (see Search), which visits fewer nodes
+    but returns the same action. Counts of the work done are added to
+    stats, a SearchStats, if one is given, and on_expand is passed on to
+    Search to watch the search as it runs.
+
+    With depth or budget (in seconds) set, the search deepens one move at
+    a time up to depth, scoring unfinished games heuristically, and
+    returns the best action of the deepest search finished within the
+    budget. On boards larger than 3 x 3 it then only considers cells next
+    to occupied ones. Pruning is strongly recommended for these searches.
+
+    Setting stop, a threading.Event, from another thread ends the search
+    early: a depth or budget search returns its best action so far, while
+    a full search raises SearchTimeout.
+    """
+    return solve(board, cache, pruning, ordering, stats, k, depth, budget,
+                 stop, on_expand)[0]
+
+
+def solve(board, cache=transpositions, pruning=False, ordering=None,
+          stats=None, k=3, depth=None, budget=None, stop=None,
+          on_expand=None):
+    """
+    Returns (action, value): the action minimax() plays on the board, with
+    the same arguments, and the value of the board it found. The action
+    is None if the game is over.
+    """
+    state = GameState(board, k)
+
+    if state.terminal():
+        return None, state.utility()
+
+    if depth is None and budget is None:
+        # to speed up the first move; the game is a tie under perfect play
+        if state.size == 3 and k == 3 and state.empty == 9:
+            return (0, 1), 0
+
+        # keep actions() order here so the first winning move, or failing
+        # that the first drawing move, is picked whatever the inner ordering
+        search = Search(cache, pruning, ordering, stats, stop=stop,
+                        on_expand=on_expand)
+        return search.best_action(state, list(actions(board)))
+
+    deadline = None if budget is None else time.monotonic() + budget
+    search = Search(cache, pruning, ordering, stats, deadline,
+                    local=state.size > 3, stop=stop, on_expand=on_expand)
+    moves = search.ordered_actions(state, 0)
+    best_action = moves[0]
+    value = state.evaluate()
+    deepest = state.empty if depth is None else min(depth, state.empty)
+
+    for limit in range(1, deepest + 1):
+        try:
+            best_action, value = search.best_action(state, moves, limit)
+        except SearchTimeout:
+            break
+
+        # search the best move first next time, where it prunes the most
+        moves.remove(best_action)
+        moves.insert(0, best_action)
+
+        if value in (1, -1):
+            break
+
+    return best_action, value
+
+
+def minimax_batch(boards, processes=1, pruning=False, ordering=None, k=3,
+                  depth=None, budget=None):
+    """
+    Returns a list of (action, value) from solve() for each of the boards,
+    in order.
+
+    Each distinct board is solved once. With processes=1 they share the
+    module's transposition table; otherwise they are spread across a pool
+    of that many processes (None for one per CPU), each of which shares
+    its own table across its part of the batch.
+    """
+    keys = [board_key(board, k) for board in boards]
+    distinct = {}
+    for key, board in zip(keys, boards):
+        distinct.setdefault(key, board)
+
+    job = partial(solve, pruning=pruning, ordering=ordering, k=k,
+                  depth=depth, budget=budget)
+    if processes == 1 or len(distinct) < 2:
+        solved = [job(board) for board in distinct.values()]
+    else:
+        workers = processes or os.cpu_count() or 1
+        # large chunks keep related boards on one worker's table
+        chunksize = max(1, len(distinct) // (4 * workers))
+        with ProcessPoolExecutor(workers) as pool:
+            solved = list(pool.map(job, distinct.values(),
+                                   chunksize=chunksize))
 
-    return None
\ No newline at end of file
+    found = dict(zip(distinct, solved))
+    return [found[key] for key in keys]
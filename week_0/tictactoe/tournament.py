@@ -0,0 +1,156 @@
+"""
+Headless tournament between Tic Tac Toe engines
+
+Plays every pair of the named engines against each other, with each
+engine taking X and O in turn, across a pool of processes, and reports
+games per second, time per move percentiles and results. Each game opens
+with a few random moves so deterministic engines play varied games.
+
+    python tournament.py [--games N] [--opening PLIES] [--processes P]
+                         [--size N] [--k K] engine [engine ...]
+"""
+
+import argparse
+import os
+import random
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import bitboard
+import mcts
+import perfect
+import tictactoe as ttt
+from benchmark import ENGINES as SEARCHES, percentile
+
+# engines by name, each called as engine(board, k) and returning an action
+ENGINES = {name: partial(ttt.minimax, **options)
+           for name, options in SEARCHES.items()}
+ENGINES["timed"] = partial(ttt.minimax, pruning=True, ordering="killer",
+                           budget=0.1)
+ENGINES["mcts"] = partial(mcts.mcts, playouts=500)
+
+# engines that only play 3 x 3 boards with three in a row
+CLASSIC = {"bitboard": bitboard.minimax, "table": perfect.minimax}
+
+
+def engine(name, k):
+    """
+    Returns a function playing a move with engine name on a board.
+    """
+    if name in CLASSIC:
+        return CLASSIC[name]
+    return partial(ENGINES[name], k=k)
+
+
+def play(match):
+    """
+    Plays one game for match, a tuple (x_name, o_name, size, k, opening,
+    seed), and returns (winner, x_seconds, o_seconds): the winner or None
+    and the time each engine took per move.
+    """
+    x_name, o_name, size, k, opening, seed = match
+    players = {ttt.X: engine(x_name, k), ttt.O: engine(o_name, k)}
+    seconds = {ttt.X: [], ttt.O: []}
+    rng = random.Random(seed)
+    board = ttt.initial_state(size)
+    moves = 0
+
+    while not ttt.terminal(board, k):
+        turn = ttt.player(board)
+        if moves < opening:
+            action = rng.choice(sorted(ttt.actions(board)))
+        else:
+            start = time.perf_counter()
+            action = players[turn](board)
+            seconds[turn].append(time.perf_counter() - start)
+        board = ttt.result(board, action)
+        moves += 1
+
+    return ttt.winner(board, k), seconds[ttt.X], seconds[ttt.O]
+
+
+def tournament(names, games, size=3, k=3, opening=2, processes=None):
+    """
+    Plays games games of each ordered pair of engines (or of an engine
+    against itself, if only one is named) and returns (seconds, results,
+    latencies): the time taken, a dict of [X wins, O wins, ties] per
+    (x_name, o_name) pair and a dict of move times per engine name.
+    """
+    pairs = [(x, o) for x in names for o in names if x != o]
+    if not pairs:
+        pairs = [(names[0], names[0])]
+    matches = [(x, o, size, k, opening, seed)
+               for x, o in pairs for seed in range(games)]
+
+    # build the perfect-play table once, before workers race to build it
+    if "table" in names:
+        perfect.load()
+
+    workers = processes or os.cpu_count() or 1
+    start = time.perf_counter()
+    with ProcessPoolExecutor(workers) as pool:
+        played = list(pool.map(play, matches,
+                               chunksize=max(1, len(matches) // (4 * workers))))
+    seconds = time.perf_counter() - start
+
+    results = {pair: [0, 0, 0] for pair in pairs}
+    latencies = {name: [] for name in names}
+    for (x, o, *_), (winner, x_seconds, o_seconds) in zip(matches, played):
+        column = 0 if winner == ttt.X else 1 if winner == ttt.O else 2
+        results[(x, o)][column] += 1
+        latencies[x].extend(x_seconds)
+        latencies[o].extend(o_seconds)
+
+    return seconds, results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    known = list(ENGINES) + list(CLASSIC)
+    parser.add_argument("engines", nargs="+", metavar="engine",
+                        help=f"engines to play: {', '.join(known)}")
+    parser.add_argument("--games", type=int, default=100,
+                        help="games per pair of engines and colours")
+    parser.add_argument("--opening", type=int, default=2,
+                        help="random moves at the start of each game")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="worker processes, one per CPU by default")
+    parser.add_argument("--size", type=int, default=3)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    for name in args.engines:
+        if name not in known:
+            parser.error(f"unknown engine {name!r}")
+        if name in CLASSIC and (args.size, args.k) != (3, 3):
+            parser.error(f"{name} only plays 3 x 3 boards with k = 3")
+
+    seconds, results, latencies = tournament(
+        args.engines, args.games, args.size, args.k, args.opening,
+        args.processes
+    )
+
+    played = sum(sum(counts) for counts in results.values())
+    print(f"{played} games in {seconds:.2f}s, {played / seconds:.1f} games/s")
+
+    print(f"\n{'X':<16}{'O':<16}{'X wins':>8}{'O wins':>8}{'ties':>8}")
+    for (x, o), (x_wins, o_wins, ties) in results.items():
+        print(f"{x:<16}{o:<16}{x_wins:>8}{o_wins:>8}{ties:>8}")
+
+    print(f"\n{'engine':<16}{'moves':>8}{'p50 ms':>9}{'p95 ms':>9}"
+          f"{'p99 ms':>9}{'max ms':>9}")
+    for name, times in latencies.items():
+        if not times:
+            continue
+        times.sort()
+        print(f"{name:<16}{len(times):>8}"
+              f"{percentile(times, 0.5) * 1000:>9.3f}"
+              f"{percentile(times, 0.95) * 1000:>9.3f}"
+              f"{percentile(times, 0.99) * 1000:>9.3f}"
+              f"{times[-1] * 1000:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
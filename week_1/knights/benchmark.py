@@ -0,0 +1,98 @@
+"""
+Benchmark for the model checking backends
+
+Generates random puzzles with more and more characters and asks each
+backend which of the knight and knave symbols the knowledge base
+entails, one model_check per symbol. Reports the symbols entailed, wall
+time, models visited and peak memory for each size, so the backends can
+be compared and the size where each becomes too slow found. A backend
+taking longer than the budget on one size is skipped for larger ones.
+Memory is traced on a second run, since tracing slows Python down, and
+only counts the main process.
+
+    python benchmark.py [--sizes N ...] [--depth D] [--puzzles P]
+                        [--seed S] [--budget SECONDS] [backend ...]
+"""
+
+import argparse
+import time
+import tracemalloc
+
+import generator
+from logic import BACKENDS, CheckStats, model_check
+
+
+def run(backend, puzzles):
+    """
+    Checks every symbol of each of puzzles, tuples from generator.puzzle(),
+    with backend, and returns (entailed, seconds, stats): the number of
+    symbols entailed, the time taken and the CheckStats of the run.
+    """
+    stats = CheckStats()
+    entailed = 0
+    start = time.perf_counter()
+    for knowledge, symbols, _ in puzzles:
+        for symbol in symbols:
+            if model_check(knowledge, symbol, backend, stats):
+                entailed += 1
+    return entailed, time.perf_counter() - start, stats
+
+
+def peak_memory(backend, puzzles):
+    """Returns the most bytes allocated at once while running backend."""
+    tracemalloc.start()
+    try:
+        run(backend, puzzles)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("backends", nargs="*", default=list(BACKENDS),
+                        metavar="backend",
+                        help=f"backends to run: {', '.join(BACKENDS)}")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=[2, 4, 6, 8, 10, 12],
+                        help="numbers of characters per puzzle")
+    parser.add_argument("--depth", type=int, default=2,
+                        help="most connectives nested in a statement")
+    parser.add_argument("--puzzles", type=int, default=3,
+                        help="puzzles of each size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget", type=float, default=10.0,
+                        help="seconds after which a backend is dropped")
+    args = parser.parse_args()
+
+    for backend in args.backends:
+        if backend not in BACKENDS:
+            parser.error(f"unknown backend {backend!r}")
+
+    running = list(args.backends)
+    print(f"{'size':>4}  {'backend':<10}{'entailed':>9}{'total s':>9}"
+          f"{'ms/query':>10}{'models':>12}{'peak KiB':>10}")
+
+    for size in args.sizes:
+        puzzles = [generator.puzzle(size, args.depth, args.seed + n)
+                   for n in range(args.puzzles)]
+        queries = sum(len(symbols) for _, symbols, _ in puzzles)
+
+        for backend in list(running):
+            try:
+                entailed, seconds, stats = run(backend, puzzles)
+            except ImportError as error:
+                print(f"{size:>4}  {backend:<10}skipped: {error}")
+                running.remove(backend)
+                continue
+            peak = peak_memory(backend, puzzles)
+
+            print(f"{size:>4}  {backend:<10}{entailed:>9}{seconds:>9.2f}"
+                  f"{seconds / queries * 1000:>10.3f}{stats.models:>12}"
+                  f"{peak / 1024:>10.0f}")
+            if seconds > args.budget:
+                running.remove(backend)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Reading and writing knowledge bases as text
+
+Two formats are supported, both read a line at a time so that files of
+any size can be loaded without holding their text in memory:
+
+DIMACS CNF, the standard input format of SAT solvers: a header line
+"p cnf <variables> <clauses>" followed by clauses, each a list of
+literals ended by 0. Lines starting with "c" are comments; the writer
+records the name of each symbol in a comment "c var <variable> <name>",
+which the reader uses to name the symbols it builds.
+
+Formulas, one sentence per line, in the syntax of Sentence.formula():
+¬, ∧, ∨, => and <=>, with ~, & and | accepted for the first three,
+parentheses, and ⊤ and ⊥ for TRUE and FALSE, the empty And and Or.
+Names are whatever lies between operators, with the spaces around them
+stripped, so "(A is a Knight) ∨ (A is a Knave)" has two symbols. Blank
+lines and lines starting with # are skipped.
+"""
+
+import re
+
+from logic import (FALSE, TRUE, And, Biconditional, CNFEncoder, Implication,
+                   Not, Or, Symbol)
+from sat import Solver
+
+# binding strength and associativity of each binary operator
+BINARY = {
+    "and": (4, "left"),
+    "or": (3, "left"),
+    "implies": (2, "right"),
+    "iff": (1, "right"),
+}
+
+TOKENS = {
+    "¬": "not", "~": "not",
+    "∧": "and", "&": "and",
+    "∨": "or", "|": "or",
+    "=>": "implies",
+    "<=>": "iff",
+    "(": "(", ")": ")",
+    "⊤": "true", "⊥": "false",
+}
+
+SPLIT = re.compile(r"(<=>|=>|[¬~∧&∨|()⊤⊥])")
+
+# characters a symbol name cannot contain and still be read back
+RESERVED = re.compile(r"<=>|=>|[¬~∧&∨|()⊤⊥#\n]")
+
+
+def tokens(text):
+    """
+    Returns the tokens of formula text: operator and constant names from
+    TOKENS and symbol names.
+    """
+    found = []
+    for piece in SPLIT.split(text):
+        piece = piece.strip()
+        if piece:
+            found.append(TOKENS[piece] if piece in TOKENS
+                         else ("name", piece))
+    return found
+
+
+def build(op, operands):
+    """Returns the sentence for operator op applied to operands."""
+    if op == "not":
+        return Not(*operands)
+    if op == "and":
+        return And(*operands)
+    if op == "or":
+        return Or(*operands)
+    if op == "implies":
+        return Implication(*operands)
+    return Biconditional(*operands)
+
+
+def parse(text):
+    """
+    Returns the sentence written as text, with ¬ binding tightest, then
+    ∧, ∨, => and <=>. Runs of ∧ or ∨ become one And or Or, and => and
+    <=> group to the right. Parsing uses explicit stacks, so nesting is
+    bounded only by memory. Raises ValueError if text is not a formula.
+    """
+    operands = []
+
+    # pending operators, as [op, operand count], and open parentheses
+    operators = []
+    expecting = True
+
+    def reduce():
+        op, count = operators.pop()
+        if len(operands) < count:
+            raise ValueError(f"missing operand in {text!r}")
+        arguments = operands[len(operands) - count:]
+        del operands[len(operands) - count:]
+        operands.append(build(op, arguments))
+
+    for token in tokens(text):
+        if isinstance(token, tuple) or token in ("true", "false"):
+            if not expecting:
+                raise ValueError(f"missing operator in {text!r}")
+            if token == "true":
+                operands.append(TRUE)
+            elif token == "false":
+                operands.append(FALSE)
+            else:
+                operands.append(Symbol(token[1]))
+            expecting = False
+        elif token in ("(", "not"):
+            if not expecting:
+                raise ValueError(f"missing operator in {text!r}")
+            operators.append([token, 1])
+        elif token == ")":
+            if expecting:
+                raise ValueError(f"missing operand in {text!r}")
+            while operators and operators[-1][0] != "(":
+                reduce()
+            if not operators:
+                raise ValueError(f"unbalanced parentheses in {text!r}")
+            operators.pop()
+        else:
+            if expecting:
+                raise ValueError(f"missing operand in {text!r}")
+            strength, grouping = BINARY[token]
+            while operators and operators[-1][0] != "(":
+                top = operators[-1][0]
+                if top == token and grouping == "left":
+                    break
+                if top != "not" and (BINARY[top][0] < strength or (
+                        BINARY[top][0] == strength and grouping == "right")):
+                    break
+                reduce()
+            if operators and operators[-1][0] == token and grouping == "left":
+                operators[-1][1] += 1
+            else:
+                operators.append([token, 2])
+            expecting = True
+
+    if expecting:
+        raise ValueError(f"missing operand in {text!r}")
+    while operators:
+        if operators[-1][0] == "(":
+            raise ValueError(f"unbalanced parentheses in {text!r}")
+        reduce()
+    return operands[0]
+
+
+def read_formulas(lines):
+    """
+    Yields the sentence on each line of lines, such as an open file,
+    skipping blank lines and comments.
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        try:
+            yield parse(line)
+        except ValueError as error:
+            raise ValueError(f"line {number}: {error}")
+
+
+def load_formulas(lines):
+    """Returns the conjunction of the sentences read from lines."""
+    return And(*read_formulas(lines))
+
+
+def write_formulas(file, sentences):
+    """
+    Writes each of sentences to file on a line of its own; a knowledge base
+    can be written as the conjuncts of its And. Raises ValueError for a
+    symbol whose name could not be read back.
+    """
+    for sentence in sentences:
+        for name in sentence.symbols():
+            if not name.strip() or RESERVED.search(name):
+                raise ValueError(f"cannot write symbol name {name!r}")
+        file.write(sentence.formula() + "\n")
+
+
+def read_dimacs(lines, names=None):
+    """
+    Yields each clause of the DIMACS CNF in lines, such as an open file, as
+    a list of literals. If names is a dict, the variable names recorded
+    in comments are added to it as they are read. Raises ValueError if
+    the input is malformed or has a different number of clauses or
+    variables than its header says.
+    """
+    header = None
+    clause = []
+    count = 0
+
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line:
+            continue
+
+        if line[0] == "c":
+            fields = line.split(None, 3)
+            if names is not None and len(fields) == 4 and fields[1] == "var":
+                names[int(fields[2])] = fields[3]
+            continue
+        if line[0] == "%":
+            break
+
+        if line[0] == "p":
+            fields = line.split()
+            if header is not None or len(fields) != 4 or fields[1] != "cnf":
+                raise ValueError(f"line {number}: bad header {line!r}")
+            header = (int(fields[2]), int(fields[3]))
+            continue
+        if header is None:
+            raise ValueError(f"line {number}: clause before the header")
+
+        for field in line.split():
+            try:
+                literal = int(field)
+            except ValueError:
+                raise ValueError(f"line {number}: bad literal {field!r}")
+            if abs(literal) > header[0]:
+                raise ValueError(f"line {number}: variable {abs(literal)} "
+                                 f"above {header[0]}")
+            if literal:
+                clause.append(literal)
+            else:
+                count += 1
+                yield clause
+                clause = []
+
+    if clause:
+        count += 1
+        yield clause
+    if header is None:
+        raise ValueError("no DIMACS header")
+    if count != header[1]:
+        raise ValueError(f"{count} clauses, header says {header[1]}")
+
+
+def read_dimacs_sentences(lines):
+    """
+    Yields an Or of literals for each clause of the DIMACS CNF in lines.
+    Variables are named as recorded in comments, or x1, x2, ... if not.
+    """
+    names = {}
+    symbols = {}
+    for clause in read_dimacs(lines, names):
+        literals = []
+        for literal in clause:
+            variable = abs(literal)
+            if variable not in symbols:
+                symbols[variable] = Symbol(names.get(variable, f"x{variable}"))
+            symbol = symbols[variable]
+            literals.append(symbol if literal > 0 else Not(symbol))
+        yield Or(*literals)
+
+
+def load_dimacs(lines):
+    """
+    Returns a Solver holding the clauses of the DIMACS CNF in lines, added
+    as they are read.
+    """
+    solver = Solver()
+    for clause in read_dimacs(lines):
+        solver.add_clause(clause)
+    return solver
+
+
+def write_dimacs(file, clauses, variables, names=None):
+    """
+    Writes clauses, a sequence of lists of literals over variables 1 to
+    variables, to file as DIMACS CNF, with a comment for each variable
+    named in names, a dict of variable numbers to names.
+    """
+    file.write(f"p cnf {variables} {len(clauses)}\n")
+    for variable, name in sorted((names or {}).items()):
+        if "\n" in name:
+            raise ValueError(f"cannot write symbol name {name!r}")
+        file.write(f"c var {variable} {name}\n")
+    for clause in clauses:
+        file.write(" ".join(map(str, clause)) + " 0\n")
+
+
+def write_sentences_dimacs(file, sentences):
+    """
+    Writes the Tseitin clauses of sentences to file as DIMACS CNF, naming
+    the variable of each symbol. The clauses have a model exactly when
+    the sentences do, with extra variables for compound subformulas.
+    """
+    encoder = CNFEncoder()
+    for sentence in sentences:
+        encoder.add(sentence)
+    names = {variable: name for name, variable in encoder.variables.items()}
+    write_dimacs(file, encoder.clauses, encoder.count, names)
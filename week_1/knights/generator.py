@@ -0,0 +1,106 @@
+"""
+Random Knights and Knaves puzzles
+
+puzzle(n) builds a puzzle like those in puzzle.py for n characters: each
+character is a knight or a knave, chosen at random, and makes a random
+statement about the others, nested up to a given depth. Statements are
+built to agree with the hidden roles, so every puzzle has at least that
+solution, though it may have others.
+"""
+
+import random
+
+from logic import And, Biconditional, Implication, Not, Or, Symbol
+
+
+def name(i):
+    """Returns the name of character i: A to Z, then P26, P27 and so on."""
+    return chr(ord("A") + i) if i < 26 else f"P{i}"
+
+
+def characters(n):
+    """Returns the (knight, knave) symbols of each of n characters."""
+    return [(Symbol(f"{name(i)} is a Knight"), Symbol(f"{name(i)} is a Knave"))
+            for i in range(n)]
+
+
+def statement(rng, people, speaker, depth):
+    """
+    Returns a random statement by speaker about the other people, a list
+    of (knight, knave) symbols, nested up to depth connectives. Besides
+    the usual connectives, a statement can report another character's
+    claim: "B says s" holds when B is a knight exactly if s is true.
+    """
+    others = [i for i in range(len(people)) if i != speaker] or [speaker]
+
+    # each entry is [depth left, kind, operands still to build, built]
+    stack = [[depth, None, 0, []]]
+    result = None
+
+    while stack:
+        frame = stack[-1]
+        left, kind, wanted, built = frame
+        if result is not None:
+            built.append(result)
+            result = None
+
+        if kind is None:
+            if left == 0 or rng.random() < 0.3:
+                stack.pop()
+                result = people[rng.choice(others)][rng.randrange(2)]
+                continue
+            kind = rng.choice(("not", "and", "or", "implies", "iff", "says"))
+            frame[1] = kind
+            frame[2] = wanted = 1 if kind in ("not", "says") else (
+                rng.randint(2, 3) if kind in ("and", "or") else 2)
+
+        if len(built) < wanted:
+            stack.append([left - 1, None, 0, []])
+            continue
+
+        stack.pop()
+        if kind == "not":
+            result = Not(built[0])
+        elif kind == "and":
+            result = And(*built)
+        elif kind == "or":
+            result = Or(*built)
+        elif kind == "implies":
+            result = Implication(*built)
+        elif kind == "iff":
+            result = Biconditional(*built)
+        else:
+            knight = people[rng.choice(others)][0]
+            result = Biconditional(knight, built[0])
+
+    return result
+
+
+def puzzle(n, depth=2, seed=None):
+    """
+    Returns (knowledge, symbols, roles) for a random puzzle with n
+    characters whose statements nest up to depth connectives: the
+    knowledge base, every character's knight and knave symbols, and
+    the hidden roles, True for each character who is a knight.
+    """
+    rng = random.Random(seed)
+    people = characters(n)
+    roles = [rng.random() < 0.5 for _ in range(n)]
+    model = {}
+    for (knight, knave), role in zip(people, roles):
+        model[knight.name] = role
+        model[knave.name] = not role
+
+    knowledge = []
+    for knight, knave in people:
+        knowledge.append(Or(knight, knave))
+        knowledge.append(Not(And(knight, knave)))
+
+    for speaker, (knight, _) in enumerate(people):
+        said = statement(rng, people, speaker, depth)
+        if said.evaluate(model) != roles[speaker]:
+            said = Not(said)
+        knowledge.append(Biconditional(knight, said))
+
+    symbols = [symbol for pair in people for symbol in pair]
+    return And(*knowledge), symbols, roles
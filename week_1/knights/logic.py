@@ -1,19 +1,205 @@
 import itertools
+import math
+import multiprocessing
+import os
+import weakref
+
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+
+from sat import Solver
+
+
+# every live sentence, keyed on its class and parts, so that building a
+# sentence equal to an existing one returns the existing one
+interned = weakref.WeakValueDictionary()
 
 
 class Sentence():
+    """
+    Sentences are immutable and interned: equal sentences are the same
+    object, so they compare by identity, and each keeps the hash and
+    symbols computed when it was built.
+    """
+
+    __slots__ = ("_hash", "_symbols", "__weakref__")
+
+    @classmethod
+    def intern(cls, parts, symbols, **fields):
+        """
+        Returns the sentence of class cls made of parts, building it with
+        symbols and attributes fields if no such sentence exists yet.
+        """
+        key = (cls, parts)
+        try:
+            return interned[key]
+        except KeyError:
+            pass
+
+        sentence = object.__new__(cls)
+        for name, value in fields.items():
+            object.__setattr__(sentence, name, value)
+        object.__setattr__(sentence, "_hash", hash((cls.__name__, parts)))
+        object.__setattr__(sentence, "_symbols", symbols)
+        interned[key] = sentence
+        return sentence
+
+    def __setattr__(self, name, value):
+        raise AttributeError("sentences are immutable")
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self.parts())
+
+    def __repr__(self):
+        templates = {}
+        for sentence in postorder(self, Sentence.operands):
+            if isinstance(sentence, Symbol):
+                templates[sentence] = [sentence.name]
+                continue
+            template = [f"{type(sentence).__name__}("]
+            for part in sentence.parts():
+                if len(template) > 1:
+                    template.append(", ")
+                template.append(part)
+            template.append(")")
+            templates[sentence] = template
+        return write(self, templates)
+
+    def parts(self):
+        """Returns the arguments the sentence was built from."""
+        return ()
 
     def evaluate(self, model):
-        """Evaluates the logical sentence."""
-        raise Exception("nothing to evaluate")
+        """
+        Evaluates the logical sentence, short-circuiting like and, or and
+        not ... or, on an explicit stack so that nesting depth is bounded
+        only by memory.
+        """
+        # each frame is [sentence, operands evaluated, left side's value]
+        stack = [[self, 0, None]]
+        value = None
+
+        while stack:
+            frame = stack[-1]
+            sentence, done = frame[0], frame[1]
+            frame[1] += 1
+
+            if isinstance(sentence, Symbol):
+                value = sentence.evaluate(model)
+            elif isinstance(sentence, Not):
+                if done == 0:
+                    stack.append([sentence.operand, 0, None])
+                    continue
+                value = not value
+            elif isinstance(sentence, (And, Or)):
+                parts = sentence.parts()
+                # an And stops at its first false part, an Or at a true one
+                stop = isinstance(sentence, Or)
+                if done == 0:
+                    value = not stop
+                if value is not stop and done < len(parts):
+                    stack.append([parts[done], 0, None])
+                    continue
+            elif isinstance(sentence, Implication):
+                if done == 0:
+                    stack.append([sentence.antecedent, 0, None])
+                    continue
+                if done == 1:
+                    if not value:
+                        value = True
+                    else:
+                        stack.append([sentence.consequent, 0, None])
+                        continue
+            elif isinstance(sentence, Biconditional):
+                if done == 0:
+                    stack.append([sentence.left, 0, None])
+                    continue
+                if done == 1:
+                    frame[2] = value
+                    stack.append([sentence.right, 0, None])
+                    continue
+                value = frame[2] == value
+            else:
+                raise Exception("nothing to evaluate")
+
+            stack.pop()
+
+        return value
 
     def formula(self):
-        """Returns string formula representing logical sentence."""
-        return ""
+        """
+        Returns string formula representing logical sentence, built on an
+        explicit stack so that nesting depth is bounded only by memory.
+        Operands are parenthesized unless they are constants or symbols
+        whose names need no parentheses.
+        """
+        # whether each subformula is written unparenthesized as an operand
+        bare = {}
+        templates = {}
+
+        def wrap(operand):
+            return [operand] if bare[operand] else ["(", operand, ")"]
+
+        for sentence in postorder(self, Sentence.operands):
+            parts = sentence.parts()
+            bare[sentence] = False
+            if isinstance(sentence, Symbol):
+                templates[sentence] = [sentence.name]
+                bare[sentence] = (
+                    Sentence.parenthesize(sentence.name) == sentence.name)
+                continue
+            if isinstance(sentence, (And, Or)) and len(parts) == 1:
+                templates[sentence] = [parts[0]]
+                bare[sentence] = bare[parts[0]]
+                continue
+            if not parts:
+                templates[sentence] = (["⊤"] if isinstance(sentence, And)
+                                       else ["⊥"] if isinstance(sentence, Or)
+                                       else [])
+                bare[sentence] = True
+                continue
+
+            if isinstance(sentence, Not):
+                templates[sentence] = ["¬", *wrap(sentence.operand)]
+                continue
+            if isinstance(sentence, And):
+                separator = " ∧ "
+            elif isinstance(sentence, Or):
+                separator = " ∨  "
+            elif isinstance(sentence, Implication):
+                separator = " => "
+            else:
+                separator = " <=> "
+            template = []
+            for part in parts:
+                if template:
+                    template.append(separator)
+                template.extend(wrap(part))
+            templates[sentence] = template
+
+        return write(self, templates)
 
     def symbols(self):
-        """Returns a set of all symbols in the logical sentence."""
-        return set()
+        """Returns a frozenset of all symbols in the logical sentence."""
+        return self._symbols
+
+    def operands(self):
+        """Returns the sentences the sentence is built from."""
+        return () if isinstance(self, Symbol) else self.parts()
+
+    def size(self):
+        """Returns the number of distinct subformulas, counting itself."""
+        return sum(1 for _ in postorder(self, Sentence.operands))
+
+    def compile(self, symbols):
+        """
+        Returns a function evaluating the logical sentence on a sequence of
+        truth values, the i-th of which is the value of symbols[i].
+        """
+        return compile_program(program(self, symbols))
 
     @classmethod
     def validate(cls, sentence):
@@ -44,17 +230,13 @@ class Sentence():
 
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+    __slots__ = ("name",)
 
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern((name,), frozenset((name,)), name=name)
 
-    def __repr__(self):
-        return self.name
+    def parts(self):
+        return (self.name,)
 
     def evaluate(self, model):
         try:
@@ -62,234 +244,1105 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
-        return self.name
-
-    def symbols(self):
-        return {self.name}
-
 
 class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    __slots__ = ("operand",)
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
-
-    def __repr__(self):
-        return f"Not({self.operand})"
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand.symbols(), operand=operand)
 
-    def evaluate(self, model):
-        return not self.operand.evaluate(model)
+    def parts(self):
+        return (self.operand,)
 
-    def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+class And(Sentence):
 
+    __slots__ = ("conjuncts",)
 
-class And(Sentence):
-    def __init__(self, *conjuncts):
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        symbols = frozenset().union(*[c.symbols() for c in conjuncts])
+        return cls.intern(conjuncts, symbols, conjuncts=conjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
-
-    def __repr__(self):
-        conjunctions = ", ".join(
-            [str(conjunct) for conjunct in self.conjuncts]
-        )
-        return f"And({conjunctions})"
+    def parts(self):
+        return self.conjuncts
 
     def add(self, conjunct):
-        Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
-
-    def evaluate(self, model):
-        return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
+        raise TypeError("sentences are immutable; "
+                        "use And(*sentence.conjuncts, conjunct)")
 
-    def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+class Or(Sentence):
 
+    __slots__ = ("disjuncts",)
 
-class Or(Sentence):
-    def __init__(self, *disjuncts):
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        symbols = frozenset().union(*[d.symbols() for d in disjuncts])
+        return cls.intern(disjuncts, symbols, disjuncts=disjuncts)
 
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+    def parts(self):
+        return self.disjuncts
 
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
 
-    def __repr__(self):
-        disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
-        return f"Or({disjuncts})"
-
-    def evaluate(self, model):
-        
-        for disjunct in self.disjuncts:
-            print(disjunct.evaluate(model)) 
-            
-        return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
-
-    def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
-
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+class Implication(Sentence):
 
+    __slots__ = ("antecedent", "consequent")
 
-class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
-
-    def __repr__(self):
-        return f"Implication({self.antecedent}, {self.consequent})"
+        return cls.intern((antecedent, consequent),
+                          antecedent.symbols() | consequent.symbols(),
+                          antecedent=antecedent, consequent=consequent)
 
-    def evaluate(self, model):
-        return ((not self.antecedent.evaluate(model))
-                or self.consequent.evaluate(model))
+    def parts(self):
+        return (self.antecedent, self.consequent)
 
-    def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+class Biconditional(Sentence):
 
+    __slots__ = ("left", "right")
 
-class Biconditional(Sentence):
-    def __init__(self, left, right):
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        return cls.intern((left, right), left.symbols() | right.symbols(),
+                          left=left, right=right)
+
+    def parts(self):
+        return (self.left, self.right)
+
+
+def postorder(root, children, done=()):
+    """
+    Yields root and every node reachable from it through children(node),
+    each once and after all of its children, using an explicit stack.
+    Nodes in done, a set or dict, are treated as already visited; done is
+    only looked in, never copied, so it can be large.
+    """
+    seen = set()
+    stack = [(root, False)]
+
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            yield node
+            continue
+        if node in seen or node in done:
+            continue
+        seen.add(node)
+
+        stack.append((node, True))
+        for child in reversed(children(node)):
+            if child not in seen and child not in done:
+                stack.append((child, False))
+
+
+def write(root, templates):
+    """
+    Returns the text of root, where templates maps root and each sentence
+    in its templates to a list of strings and the sentences whose text
+    goes in their place, expanded on an explicit stack.
+    """
+    pieces = []
+    stack = [root]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, str):
+            pieces.append(item)
+        else:
+            stack.extend(reversed(templates[item]))
+    return "".join(pieces)
 
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
 
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+# the constants, as the empty conjunction and disjunction
+TRUE = And()
+FALSE = Or()
 
-    def __repr__(self):
-        return f"Biconditional({self.left}, {self.right})"
 
-    def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+class SimplifyStats():
+    """
+    Counters filled in by simplify(): sentences simplified and their
+    total size() before and after.
+    """
 
-    def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+    def __init__(self):
+        self.sentences = 0
+        self.before = 0
+        self.after = 0
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def __repr__(self):
+        return (f"SimplifyStats(sentences={self.sentences}, "
+                f"before={self.before}, after={self.after})")
 
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
+class CheckStats(SimplifyStats):
+    """
+    Counters filled in by model_check(): those of SimplifyStats, and
+    models, the number of models the backend visited. For "prune" these
+    are partial models and for "sat" the solver's decisions.
+    """
 
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
-        print("model: ", model)
-        
-        # If model has an assignment for each symbol
-        if not symbols:
-            print("symbols2 ", symbols)
+    def __init__(self):
+        super().__init__()
+        self.models = 0
 
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                #print("symbols2 ", symbols)
-                return query.evaluate(model)
-            return True
+    def __repr__(self):
+        return (f"CheckStats(sentences={self.sentences}, "
+                f"before={self.before}, after={self.after}, "
+                f"models={self.models})")
+
+
+def visited(stats, models):
+    """Adds models to the models visited in stats, if given."""
+    if stats is not None:
+        stats.models += models
+
+
+def conjunction(parts):
+    """
+    Returns the conjunction of simplified parts, flattening nested Ands,
+    dropping repeats and TRUE, and folding to FALSE if any part is FALSE
+    or the negation of another.
+    """
+    kept = {}
+    for part in parts:
+        for conjunct in part.conjuncts if isinstance(part, And) else (part,):
+            if conjunct is FALSE:
+                return FALSE
+            kept[conjunct] = None
+
+    for conjunct in kept:
+        if isinstance(conjunct, Not) and conjunct.operand in kept:
+            return FALSE
+    if len(kept) == 1:
+        return next(iter(kept))
+    return And(*kept)
+
+
+def disjunction(parts):
+    """
+    Returns the disjunction of simplified parts, flattening nested Ors,
+    dropping repeats and FALSE, and folding to TRUE if any part is TRUE
+    or the negation of another.
+    """
+    kept = {}
+    for part in parts:
+        for disjunct in part.disjuncts if isinstance(part, Or) else (part,):
+            if disjunct is TRUE:
+                return TRUE
+            kept[disjunct] = None
+
+    for disjunct in kept:
+        if isinstance(disjunct, Not) and disjunct.operand in kept:
+            return TRUE
+    if len(kept) == 1:
+        return next(iter(kept))
+    return Or(*kept)
+
+
+def simplify(sentence, stats=None):
+    """
+    Returns a sentence equivalent to sentence, in negation normal form
+    except for biconditionals: implications become disjunctions,
+    negations are pushed down to symbols by De Morgan's laws, nested Ands
+    and Ors are flattened and deduplicated and constants are folded, TRUE
+    and FALSE being the empty And and Or. Biconditionals keep their shape
+    with simplified sides, since expanding them can double the formula.
+    """
+    def children(key):
+        sentence, negated = key
+        if isinstance(sentence, Not):
+            return [(sentence.operand, not negated)]
+        if isinstance(sentence, (And, Or)):
+            return [(part, negated) for part in sentence.parts()]
+        if isinstance(sentence, Implication):
+            return [(sentence.antecedent, not negated),
+                    (sentence.consequent, negated)]
+        if isinstance(sentence, Biconditional):
+            return [(sentence.left, False), (sentence.right, negated),
+                    (sentence.right, not negated), (sentence.left, True)]
+        return []
+
+    # simplified (sentence, negated) pairs, each after the pairs it needs
+    done = {}
+    for key in postorder((sentence, False), children):
+        current, negated = key
+        parts = [done[child] for child in children(key)]
+
+        if isinstance(current, Symbol):
+            simplified = Not(current) if negated else current
+        elif isinstance(current, Not):
+            simplified = parts[0]
+        elif isinstance(current, And):
+            simplified = disjunction(parts) if negated else conjunction(parts)
+        elif isinstance(current, Or):
+            simplified = conjunction(parts) if negated else disjunction(parts)
+        elif isinstance(current, Implication):
+            # not a or b, or when negated a and not b
+            if negated:
+                simplified = conjunction(parts)
+            else:
+                simplified = disjunction(parts)
+        elif isinstance(current, Biconditional):
+            # left <=> right, where right is already negated if need be
+            left, right, opposite, negated_left = parts
+            if left is TRUE:
+                simplified = right
+            elif left is FALSE:
+                simplified = opposite
+            elif right is TRUE:
+                simplified = left
+            elif right is FALSE:
+                simplified = negated_left
+            elif left is right:
+                simplified = TRUE
+            elif left is opposite:
+                simplified = FALSE
+            else:
+                simplified = Biconditional(left, right)
         else:
-
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            raise TypeError(f"cannot simplify {current!r}")
+
+        done[key] = simplified
+
+    simplified = done[(sentence, False)]
+    if stats is not None:
+        stats.sentences += 1
+        stats.before += sentence.size()
+        stats.after += simplified.size()
+    return simplified
+
+
+def program(sentence, symbols):
+    """
+    Returns sentence as a list of instructions, each computing one
+    subformula from earlier ones; the last computes the whole sentence.
+    An instruction is ("symbol", i) for the value of symbols[i],
+    ("not", a), ("and", (a, b, ...)), ("or", (a, b, ...)),
+    ("implies", a, b) or ("iff", a, b), where a and b are positions of
+    earlier instructions. Repeated subformulas are computed once.
+    """
+    positions = {name: i for i, name in enumerate(symbols)}
+    instructions = []
+    computed = {}
+
+    for sentence in postorder(sentence, Sentence.operands):
+        if isinstance(sentence, Symbol):
+            try:
+                instruction = ("symbol", positions[sentence.name])
+            except KeyError:
+                raise Exception(f"variable {sentence.name} not in model")
+        elif isinstance(sentence, Not):
+            instruction = ("not", computed[sentence.operand])
+        elif isinstance(sentence, (And, Or)):
+            op = "and" if isinstance(sentence, And) else "or"
+            instruction = (op, tuple(computed[p] for p in sentence.parts()))
+        elif isinstance(sentence, Implication):
+            instruction = ("implies", computed[sentence.antecedent],
+                           computed[sentence.consequent])
+        elif isinstance(sentence, Biconditional):
+            instruction = ("iff", computed[sentence.left],
+                           computed[sentence.right])
+        else:
+            raise TypeError(f"cannot compile {sentence!r}")
+
+        computed[sentence] = len(instructions)
+        instructions.append(instruction)
+
+    return instructions
+
+
+def compile_program(instructions):
+    """
+    Returns a Python function running the instructions from program() on a
+    sequence of truth values (bools, or 0 and 1) as straight-line code,
+    with no calls or lookups by name.
+    """
+    names = []
+    lines = ["def evaluate(values):"]
+
+    for n, (op, *args) in enumerate(instructions):
+        if op == "symbol":
+            names.append(f"values[{args[0]}]")
+            continue
+
+        if op == "not":
+            expression = f"not {names[args[0]]}"
+        elif op == "and":
+            expression = " and ".join(names[a] for a in args[0]) or "True"
+        elif op == "or":
+            expression = " or ".join(names[a] for a in args[0]) or "False"
+        elif op == "implies":
+            expression = f"not {names[args[0]]} or {names[args[1]]}"
+        else:
+            expression = f"{names[args[0]]} == {names[args[1]]}"
+
+        names.append(f"t{n}")
+        lines.append(f"    t{n} = {expression}")
+
+    lines.append(f"    return bool({names[-1]})")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["evaluate"]
+
+
+def compile_partial(instructions):
+    """
+    Returns a Python function running the instructions from program() on a
+    partial model, a sequence of True, False or None for unassigned
+    symbols. Connectives follow three-valued logic, so a subformula is
+    None only if its value depends on unassigned symbols. The function
+    returns a list of the value of every instruction.
+    """
+    names = []
+    lines = ["def evaluate(values):"]
+
+    for n, (op, *args) in enumerate(instructions):
+        if op == "symbol":
+            names.append(f"values[{args[0]}]")
+            continue
+
+        if op == "not":
+            a = names[args[0]]
+            expression = f"None if {a} is None else not {a}"
+        elif op in ("and", "or"):
+            # the value that decides the connective whatever the others are
+            decides = "False" if op == "and" else "True"
+            empty = "True" if op == "and" else "False"
+            operands = [names[a] for a in args[0]]
+            if not operands:
+                expression = empty
+            else:
+                decided = " or ".join(f"{a} is {decides}" for a in operands)
+                unknown = " or ".join(f"{a} is None" for a in operands)
+                expression = (f"{decides} if {decided} else "
+                              f"None if {unknown} else {empty}")
+        elif op == "implies":
+            a, b = names[args[0]], names[args[1]]
+            expression = (f"True if {a} is False or {b} is True else "
+                          f"None if {a} is None or {b} is None else False")
+        else:
+            a, b = names[args[0]], names[args[1]]
+            expression = f"None if {a} is None or {b} is None else {a} == {b}"
+
+        names.append(f"t{n}")
+        lines.append(f"    t{n} = {expression}")
+
+    lines.append(f"    return [{', '.join(names)}]")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace["evaluate"]
+
+
+class CNFEncoder():
+    """
+    Tseitin encoding of sentences into clauses for a SAT solver.
+
+    Each symbol gets a variable, numbered from 1 in the order symbols are
+    met; variables maps symbol names to them. Every And, Or, Implication
+    or Biconditional below the top level gets a fresh variable, with
+    clauses making it equivalent to the subformula, so the clauses grow
+    linearly with the sentence. New clauses are appended to clauses.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+        self.definitions = {}
+
+    def variable(self, name):
+        """Returns the variable for the symbol called name."""
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def fresh(self):
+        """Returns a new variable standing for a subformula."""
+        self.count += 1
+        return self.count
+
+    def literal(self, sentence):
+        """Returns a literal equivalent to sentence."""
+        literals = {}
+
+        def lookup(sentence):
+            if sentence in literals:
+                return literals[sentence]
+            return self.definitions[sentence]
+
+        # define every new subformula after the subformulas it is made of
+        for current in postorder(sentence, Sentence.operands,
+                                 self.definitions):
+            if isinstance(current, Symbol):
+                literals[current] = self.variable(current.name)
+                continue
+            if isinstance(current, Not):
+                literals[current] = -lookup(current.operand)
+                continue
+
+            if isinstance(current, And):
+                parts = [lookup(c) for c in current.conjuncts]
+                t = self.fresh()
+                for part in parts:
+                    self.clauses.append([-t, part])
+                self.clauses.append([t] + [-part for part in parts])
+            elif isinstance(current, Or):
+                parts = [lookup(d) for d in current.disjuncts]
+                t = self.fresh()
+                for part in parts:
+                    self.clauses.append([t, -part])
+                self.clauses.append([-t] + parts)
+            elif isinstance(current, Implication):
+                a = lookup(current.antecedent)
+                b = lookup(current.consequent)
+                t = self.fresh()
+                self.clauses.extend([[-t, -a, b], [t, a], [t, -b]])
+            elif isinstance(current, Biconditional):
+                a = lookup(current.left)
+                b = lookup(current.right)
+                t = self.fresh()
+                self.clauses.extend([[-t, -a, b], [-t, a, -b],
+                                     [t, a, b], [t, -a, -b]])
+            else:
+                raise TypeError(f"cannot encode {current!r}")
+
+            self.definitions[current] = t
+
+        return lookup(sentence)
+
+    def add(self, sentence):
+        """Adds clauses that hold exactly when sentence is true."""
+        pending = [sentence]
+        while pending:
+            sentence = pending.pop()
+            if isinstance(sentence, And):
+                pending.extend(reversed(sentence.conjuncts))
+            elif isinstance(sentence, Or):
+                self.clauses.append([self.literal(d)
+                                     for d in sentence.disjuncts])
+            elif isinstance(sentence, Implication):
+                self.clauses.append([-self.literal(sentence.antecedent),
+                                     self.literal(sentence.consequent)])
+            else:
+                self.clauses.append([self.literal(sentence)])
+
+
+class KnowledgeBase():
+    """
+    A knowledge base that grows one sentence at a time and answers
+    queries with an incremental SAT solver.
+
+    Sentences told are encoded once and their clauses stay in the solver,
+    along with every clause it learns, so each ask() only pays for what
+    changed since the last one. A query is asked by assuming it false,
+    which leaves the clauses untouched for the next query.
+    """
+
+    def __init__(self, *sentences):
+        self.sentences = []
+        self.encoder = CNFEncoder()
+        self.solver = Solver()
+
+        # number of the encoder's clauses already given to the solver
+        self.added = 0
+
+        for sentence in sentences:
+            self.tell(sentence)
+
+    def sync(self):
+        """Gives the solver the clauses encoded since the last call."""
+        self.solver.reserve(self.encoder.count)
+        clauses = self.encoder.clauses
+        while self.added < len(clauses):
+            self.solver.add_clause(clauses[self.added])
+            self.added += 1
+
+    def tell(self, sentence):
+        """Adds sentence to the knowledge base."""
+        Sentence.validate(sentence)
+        self.sentences.append(sentence)
+        self.encoder.add(sentence)
+        self.sync()
+
+    def literal(self, query):
+        """Returns the solver literal equivalent to query."""
+        literal = self.encoder.literal(query)
+        self.sync()
+        return literal
+
+    def satisfiable(self):
+        """Returns True if some model makes every sentence true."""
+        return self.solver.solve()
+
+    def ask(self, query):
+        """Returns True if the knowledge base entails query."""
+        return not self.solver.solve([-self.literal(query)])
+
+    def entailed(self, queries):
+        """
+        Returns the list of queries the knowledge base entails, in order.
+        Every model found with one query false also rules out all the
+        other queries false in it.
+        """
+        queries = list(queries)
+        literals = [self.literal(query) for query in queries]
+
+        def refute(candidates):
+            """Drops the candidates that are false in the solver's model."""
+            model = self.solver.model
+            return [n for n in candidates
+                    if model[abs(literals[n])] == (literals[n] > 0)]
+
+        if not self.solver.solve():
+            return queries
+        candidates = refute(range(len(queries)))
+
+        entailed = []
+        while candidates:
+            n = candidates.pop()
+            if self.solver.solve([-literals[n]]):
+                candidates = refute(candidates)
+            else:
+                entailed.append(n)
+
+        return [queries[n] for n in sorted(entailed)]
+
+    def knowledge(self):
+        """Returns the conjunction of every sentence told."""
+        return And(*self.sentences)
+
+
+def enumerate_check(knowledge, query, stats=None):
+    """Checks if knowledge base entails query by trying every model."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
-    
-    print("1", knowledge.symbols())
-    print("2", query.symbols())
-    print(symbols)
-    
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
-    
-
-
-rain = Symbol("rain")
-hagrid = Symbol("hagrid")
-dumbledore = Symbol("dumbldore")
-model = {'A is a Knight': True, 'B is a Knave': True}
-
-#z =Or(A, B)
-#x = Biconditional(B, A)
-
-knowledge= And(Implication(Not(rain), hagrid), Or(hagrid, dumbledore), Not(And(hagrid, dumbledore)))
-
-
-print(knowledge.symbols())
-
-
-#print(z.evaluate(model))
-
-
-
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    knowledge_true = knowledge.compile(symbols)
+    query_true = query.compile(symbols)
+
+    # If knowledge base is true in a model, then query must also be true
+    models = itertools.product((True, False), repeat=len(symbols))
+    for n, model in enumerate(models, 1):
+        if knowledge_true(model) and not query_true(model):
+            visited(stats, n)
+            return False
+    visited(stats, 2 ** len(symbols))
+    return True
+
+
+def sat_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by showing with a SAT solver
+    that knowledge and not query cannot both be true.
+    """
+    base = KnowledgeBase(knowledge)
+    entailed = base.ask(query)
+    visited(stats, base.solver.decisions)
+    return entailed
+
+
+def numpy_check(knowledge, query, chunk_bits=20, stats=None):
+    """
+    Checks if knowledge base entails query by evaluating knowledge and not
+    query on the whole truth table at once with NumPy.
+
+    Row r of the table assigns symbol i the value of bit i of r, and each
+    subformula becomes a column of bits packed into 64-bit words, so
+    connectives are bitwise operations on arrays. Rows are processed
+    2 ** chunk_bits at a time to bound memory, stopping at the first
+    chunk with a row where knowledge is true and query false.
+    """
+    try:
+        import numpy as np
+    except ImportError:
+        raise ImportError("the numpy backend needs numpy installed")
+
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    instructions = program(And(knowledge, Not(query)), symbols)
+
+    # free each column once the last instruction reading it has run
+    last_use = {}
+    for n, (op, *args) in enumerate(instructions):
+        if op != "symbol":
+            for arg in (args[0] if op in ("and", "or") else args):
+                last_use[arg] = n
+    freed = [[] for _ in instructions]
+    for arg, n in last_use.items():
+        freed[n].append(arg)
+
+    inner = min(len(symbols), chunk_bits)
+    rows = 1 << inner
+    words = max(1, rows // 64)
+    ones = np.full(words, np.uint64(0xFFFFFFFFFFFFFFFF))
+    zeros = np.zeros(words, dtype=np.uint64)
+
+    # only the first `rows` bits are real rows when there are fewer than 64
+    valid = ones.copy()
+    if rows < 64:
+        valid[0] = np.uint64((1 << rows) - 1)
+
+    # columns of the symbols that vary within a chunk
+    word_index = np.arange(words, dtype=np.uint64)
+    columns = []
+    for i in range(inner):
+        if i < 6:
+            pattern = 0
+            for bit in range(64):
+                if bit >> i & 1:
+                    pattern |= 1 << bit
+            columns.append(np.full(words, np.uint64(pattern)))
+        else:
+            column = (word_index >> np.uint64(i - 6)) & np.uint64(1)
+            columns.append(np.where(column.astype(bool), ones, zeros))
+
+    for chunk in range(1 << (len(symbols) - inner)):
+        values = []
+        for n, (op, *args) in enumerate(instructions):
+            if op == "symbol":
+                i = args[0]
+                if i < inner:
+                    value = columns[i]
+                else:
+                    value = ones if chunk >> (i - inner) & 1 else zeros
+            elif op == "not":
+                value = ~values[args[0]]
+            elif op == "and":
+                value = ones
+                for arg in args[0]:
+                    value = value & values[arg]
+            elif op == "or":
+                value = zeros
+                for arg in args[0]:
+                    value = value | values[arg]
+            elif op == "implies":
+                value = ~values[args[0]] | values[args[1]]
+            else:
+                value = ~(values[args[0]] ^ values[args[1]])
+            values.append(value)
+
+            for arg in freed[n]:
+                values[arg] = None
+
+        if np.any(values[-1] & valid):
+            visited(stats, (chunk + 1) * rows)
+            return False
+
+    visited(stats, 2 ** len(symbols))
+    return True
+
+
+def prune_check(knowledge, query, stats=None):
+    """
+    Checks if knowledge base entails query by assigning symbols one at a
+    time and evaluating knowledge and not query on the partial model,
+    cutting off every branch where knowledge is already false or query
+    already true. Each branch is on the most constrained symbol: the one
+    with the most weight in undecided subformulas that read it directly,
+    counting subformulas with fewer operands for more.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    instructions = program(And(knowledge, Not(query)), symbols)
+    evaluate = compile_partial(instructions)
+
+    # for each connective, the symbols it reads directly (or through a
+    # negation) and the weight each of them gets while it is undecided
+    readers = []
+    for n, (op, *args) in enumerate(instructions):
+        if op in ("symbol", "not"):
+            continue
+        operands = args[0] if op in ("and", "or") else args
+        read = []
+        for a in operands:
+            if instructions[a][0] == "not":
+                a = instructions[a][1]
+            if instructions[a][0] == "symbol":
+                read.append(instructions[a][1])
+        if read:
+            readers.append((n, read, 2.0 ** -len(operands)))
+
+    values = [None] * len(symbols)
+
+    def choose(computed):
+        """Returns the unassigned symbol to branch on next."""
+        weights = [0.0] * len(symbols)
+        for n, read, weight in readers:
+            if computed[n] is None:
+                for i in read:
+                    weights[i] += weight
+        best = None
+        for i, value in enumerate(values):
+            if value is None and (best is None or weights[i] > weights[best]):
+                best = i
+        return best
+
+    # symbols branched on, in order, each set to True and then False
+    branches = []
+    partial = 0
+    while True:
+        computed = evaluate(values)
+        partial += 1
+        if computed[-1] is True:
+            visited(stats, partial)
+            return False
+        if computed[-1] is None:
+            i = choose(computed)
+            values[i] = True
+            branches.append(i)
+            continue
+
+        # this branch is decided: move on to the next untried one
+        while branches and values[branches[-1]] is False:
+            values[branches.pop()] = None
+        if not branches:
+            visited(stats, partial)
+            return True
+        values[branches[-1]] = False
+
+
+# set in parallel_check's workers once any of them finds a counter-model
+stopping = None
+
+# parallel_check's pool of worker processes, with its number of workers
+# and stop event, started on first use and kept for later calls
+pool = None
+pool_workers = None
+pool_event = None
+
+
+def worker_pool(workers):
+    """
+    Returns (pool, event): the process pool with workers processes and the
+    event that stops its tasks, starting them if needed.
+    """
+    global pool, pool_workers, pool_event
+    if pool is None or pool_workers != workers:
+        if pool is not None:
+            pool.shutdown()
+        pool_event = multiprocessing.Event()
+        pool = ProcessPoolExecutor(workers, initializer=start_worker,
+                                   initargs=(pool_event,))
+        pool_workers = workers
+    return pool, pool_event
+
+
+def start_worker(event):
+    """Keeps the stop event for the tasks of a parallel_check worker."""
+    global stopping
+    stopping = event
+
+
+@lru_cache(maxsize=8)
+def compiled(instructions):
+    """Returns compile_program(instructions), once per worker."""
+    return compile_program(instructions)
+
+
+def check_part(instructions, prefix, free):
+    """
+    Returns (answer, models): answer is False if some model starting with
+    the truth values prefix, and going on with free more, makes the
+    program true, True if none does and None if the search was stopped
+    before finishing, and models the number of models tried.
+    """
+    evaluate = compiled(instructions)
+    models = itertools.product((True, False), repeat=free)
+    for n, rest in enumerate(models):
+        if n & 1023 == 0 and stopping.is_set():
+            return None, n
+        if evaluate(prefix + rest):
+            return False, n + 1
+    return True, 2 ** free
+
+
+def parallel_check(knowledge, query, processes=None, split=None,
+                   stats=None):
+    """
+    Checks if knowledge base entails query by trying every model, split on
+    the values of the first split symbols into 2 ** split parts checked
+    across processes (None for one per CPU). The first part to find a
+    model of knowledge and not query stops the others. By default there
+    are about four parts per process. The processes are started on the
+    first call and reused by later ones with as many processes.
+    """
+    symbols = sorted(knowledge.symbols() | query.symbols())
+    instructions = tuple(program(And(knowledge, Not(query)), symbols))
+
+    workers = processes or os.cpu_count() or 1
+    if split is None:
+        split = math.ceil(math.log2(workers)) + 2
+    split = min(split, len(symbols))
+    free = len(symbols) - split
+
+    executor, event = worker_pool(workers)
+    pending = {executor.submit(check_part, instructions, prefix, free)
+               for prefix in itertools.product((True, False), repeat=split)}
+    entailed = True
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        results = [future.result() for future in done]
+        visited(stats, sum(models for _, models in results))
+        if any(answer is False for answer, _ in results):
+            entailed = False
+            break
+
+    if pending:
+        # stop the other parts, and let them finish before the event is
+        # cleared so none of them runs on into the next call
+        event.set()
+        for future in pending:
+            future.cancel()
+        wait(pending)
+        event.clear()
+
+    return entailed
+
+
+# ways model_check can decide entailment, by name
+BACKENDS = {
+    "enumerate": enumerate_check,
+    "sat": sat_check,
+    "numpy": numpy_check,
+    "prune": prune_check,
+    "parallel": parallel_check,
+}
+
+
+def model_check(knowledge, query, backend="enumerate", stats=None):
+    """
+    Checks if knowledge base entails query, using the named backend:
+    "enumerate" tries every model, "sat" runs a SAT solver on the
+    clauses of knowledge and not query, "numpy" evaluates the whole
+    truth table with bitwise array operations, "prune" searches partial
+    models, skipping those already deciding the answer, and "parallel"
+    tries every model across a pool of processes. Both sentences are
+    simplified first. Counts go in stats if given a SimplifyStats, and
+    the models visited too if it is a CheckStats.
+    """
+    try:
+        check = BACKENDS[backend]
+    except KeyError:
+        raise ValueError(f"unknown model checking backend {backend!r}")
+    if not isinstance(stats, CheckStats):
+        return check(simplify(knowledge, stats), simplify(query, stats))
+    return check(simplify(knowledge, stats), simplify(query, stats),
+                 stats=stats)
+
+
+def entailed_symbols(knowledge, queries, backend="enumerate", stats=None):
+    """
+    Returns the list of queries that knowledge base entails, in order,
+    deciding them all in one pass: "enumerate" tries every model once,
+    dropping the queries false in any model of knowledge, and "sat" asks
+    the SAT solver for a model of knowledge with each remaining query
+    false, every model found ruling out all the queries false in it.
+    Other backends check the queries one at a time with model_check.
+    Knowledge is simplified first, as in model_check.
+    """
+    knowledge = simplify(knowledge, stats)
+    queries = list(queries)
+    if backend == "enumerate":
+        return enumerate_entailed(knowledge, queries)
+    if backend == "sat":
+        return KnowledgeBase(knowledge).entailed(queries)
+    return [query for query in queries
+            if model_check(knowledge, query, backend, stats)]
+
+
+def enumerate_entailed(knowledge, queries):
+    """Returns the queries true in every model of knowledge base."""
+    symbols = sorted(knowledge.symbols().union(
+        *[query.symbols() for query in queries]))
+    knowledge_true = knowledge.compile(symbols)
+    candidates = [(query, query.compile(symbols)) for query in queries]
+
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if not candidates:
+            break
+        if knowledge_true(model):
+            candidates = [(query, query_true) for query, query_true
+                          in candidates if query_true(model)]
+
+    entailed = {query for query, _ in candidates}
+    return [query for query in queries if query in entailed]
+
+
+def condition(clauses, literals):
+    """
+    Returns (clauses, true): the clauses left after making literals true
+    and then every literal forced by a unit clause, with satisfied
+    clauses and false literals removed, and the set of literals made
+    true. Returns None if some clause becomes false.
+    """
+    true = set(literals)
+    pending = clauses
+    changed = True
+
+    while changed:
+        changed = False
+        kept = []
+        for clause in pending:
+            if any(literal in true for literal in clause):
+                continue
+            reduced = tuple(literal for literal in clause
+                            if -literal not in true)
+            if not reduced:
+                return None
+            if len(reduced) == 1:
+                true.add(reduced[0])
+                changed = True
+            else:
+                kept.append(reduced)
+        pending = kept
+
+    return pending, true
+
+
+def variables_of(clauses):
+    """Returns the set of variables in clauses."""
+    return {abs(literal) for clause in clauses for literal in clause}
+
+
+def components(clauses):
+    """
+    Returns the clauses split into lists that share no variables, so the
+    models of each can be counted on their own.
+    """
+    reading = {}
+    for n, clause in enumerate(clauses):
+        for literal in clause:
+            reading.setdefault(abs(literal), []).append(n)
+
+    found = []
+    placed = [False] * len(clauses)
+    for start in range(len(clauses)):
+        if placed[start]:
+            continue
+        placed[start] = True
+        component = []
+        pending = [start]
+        while pending:
+            n = pending.pop()
+            component.append(clauses[n])
+            for literal in clauses[n]:
+                for other in reading[abs(literal)]:
+                    if not placed[other]:
+                        placed[other] = True
+                        pending.append(other)
+        found.append(component)
+    return found
+
+
+def count_models(knowledge, query=None):
+    """
+    Returns the number of models, over the symbols of knowledge and query,
+    in which knowledge is true, and query too if given.
+
+    The sentences are encoded into clauses by CNFEncoder. Each of its
+    extra variables is defined to be equivalent to a subformula, so every
+    model of the sentences extends to exactly one model of the clauses
+    and the counts are the same. The clauses are counted by splitting
+    them into components with no variables in common, whose counts
+    multiply, and otherwise branching on the variable in most clauses,
+    after which the counts add up. Each component's count is cached, so a
+    component met again on another branch is not counted twice.
+    Variables in no clause double the count. The search keeps its own
+    stack rather than recursing.
+    """
+    encoder = CNFEncoder()
+    encoder.add(knowledge)
+    if query is not None:
+        encoder.add(query)
+    clauses = []
+    for clause in encoder.clauses:
+        if not any(-literal in clause for literal in clause):
+            clauses.append(tuple(set(clause)))
+
+    conditioned = condition(clauses, ())
+    if conditioned is None:
+        return 0
+    clauses, true = conditioned
+    free = encoder.count - len(true) - len(variables_of(clauses))
+
+    # counts of components, keyed on their set of clauses
+    counted = {}
+
+    def key(clauses):
+        return frozenset(tuple(sorted(clause)) for clause in clauses)
+
+    def expand(clauses):
+        """
+        Returns (combine, parts): how to combine the counts of parts, a list
+        of (factor, clauses), into the count of clauses.
+        """
+        split = components(clauses)
+        if len(split) > 1:
+            return "multiply", [(1, component) for component in split]
+
+        occurrences = {}
+        for clause in clauses:
+            for literal in clause:
+                variable = abs(literal)
+                occurrences[variable] = occurrences.get(variable, 0) + 1
+        variable = max(occurrences, key=occurrences.get)
+
+        parts = []
+        for literal in (variable, -variable):
+            conditioned = condition(clauses, (literal,))
+            if conditioned is not None:
+                left, true = conditioned
+                unset = (len(occurrences) - len(true)
+                         - len(variables_of(left)))
+                parts.append((2 ** unset, left))
+        return "add", parts
+
+    # each frame is [key, combine, parts, next part, count so far]
+    stack = []
+    count = None
+
+    def push(clauses):
+        """Starts counting clauses, or sets count if it is known."""
+        nonlocal count
+        if not clauses:
+            count = 1
+            return
+        frame_key = key(clauses)
+        if frame_key in counted:
+            count = counted[frame_key]
+            return
+        combine, parts = expand(clauses)
+        stack.append([frame_key, combine, parts, 0,
+                      1 if combine == "multiply" else 0])
+        count = None
+
+    push(clauses)
+    while stack:
+        frame = stack[-1]
+        frame_key, combine, parts, index, total = frame
+
+        if count is not None and index > 0:
+            factor = parts[index - 1][0]
+            if combine == "multiply":
+                total *= factor * count
+            else:
+                total += factor * count
+            frame[4] = total
+            count = None
+
+        if combine == "multiply" and total == 0 or index == len(parts):
+            stack.pop()
+            counted[frame_key] = total
+            count = total
+            continue
+
+        frame[3] = index + 1
+        push(parts[index][1])
+
+    return count * 2 ** free
@@ -0,0 +1,329 @@
+"""
+Incremental CDCL SAT solver
+
+Variables are positive integers and a literal is a variable or its
+negation, as in DIMACS: 3 means variable 3 is true, -3 that it is false.
+A clause is a list of literals, at least one of which must be true.
+
+The solver learns a clause from every conflict, watches two literals per
+clause for unit propagation and picks decisions by VSIDS activity. Clauses
+may be added between calls to solve(), and learned clauses are kept, so
+a sequence of related problems gets cheaper as it goes.
+"""
+
+import heapq
+
+
+class Solver():
+
+    def __init__(self):
+        self.variables = 0
+        self.clauses = []
+        self.learned = []
+
+        # indexed by variable; value is None while unassigned
+        self.value = [None]
+        self.level = [0]
+        self.reason = [None]
+        self.activity = [0.0]
+        self.phase = [False]
+
+        # indexed by index(literal): clauses watching that literal
+        self.watches = [[], []]
+
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.increment = 1.0
+        self.order = []
+        self.model = None
+
+        # False once the clauses are known to be unsatisfiable
+        self.ok = True
+
+        self.decisions = 0
+        self.propagations = 0
+        self.conflicts = 0
+
+    def new_variable(self):
+        """Adds a variable and returns it."""
+        self.variables += 1
+        self.value.append(None)
+        self.level.append(0)
+        self.reason.append(None)
+        self.activity.append(0.0)
+        self.phase.append(False)
+        self.watches.append([])
+        self.watches.append([])
+        heapq.heappush(self.order, (0.0, self.variables))
+        return self.variables
+
+    def reserve(self, variable):
+        """Makes sure variables up to variable exist."""
+        while self.variables < variable:
+            self.new_variable()
+
+    @staticmethod
+    def index(literal):
+        """Returns the position of literal in self.watches."""
+        return 2 * literal if literal > 0 else -2 * literal + 1
+
+    def literal_value(self, literal):
+        """Returns True, False or None for an unassigned literal."""
+        value = self.value[abs(literal)]
+        if value is None or literal > 0:
+            return value
+        return not value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, returning False if the clauses are now known to be
+        unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in literals:
+            self.reserve(abs(literal))
+            value = self.literal_value(literal)
+            if value is True or -literal in clause:
+                return True
+            if value is None and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.clauses.append(clause)
+            self.watch(clause)
+        return self.ok
+
+    def watch(self, clause):
+        """Watches the first two literals of clause."""
+        self.watches[self.index(clause[0])].append(clause)
+        self.watches[self.index(clause[1])].append(clause)
+
+    def assign(self, literal, reason):
+        """Makes literal true at the current level."""
+        variable = abs(literal)
+        self.value[variable] = literal > 0
+        self.level[variable] = len(self.trail_limits)
+        self.reason[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses and returns a
+        conflicting clause, or None if there is none.
+        """
+        value = self.value
+        watches = self.watches
+        index = self.index
+
+        while self.head < len(self.trail):
+            literal = self.trail[self.head]
+            self.head += 1
+            self.propagations += 1
+
+            # clauses watching -literal, which just became false
+            false = -literal
+            watching = watches[index(false)]
+            kept = []
+            conflict = None
+
+            for position, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], clause[0]
+
+                first = clause[0]
+                first_value = value[abs(first)]
+                if first_value is not None and first_value == (first > 0):
+                    kept.append(clause)
+                    continue
+
+                for other in range(2, len(clause)):
+                    candidate = clause[other]
+                    candidate_value = value[abs(candidate)]
+                    if (candidate_value is None
+                            or candidate_value == (candidate > 0)):
+                        clause[1], clause[other] = candidate, clause[1]
+                        watches[index(candidate)].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if first_value is None:
+                        self.assign(first, clause)
+                    else:
+                        conflict = clause
+                        kept.extend(watching[position + 1:])
+                        break
+
+            watches[index(false)] = kept
+            if conflict is not None:
+                return conflict
+
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (clause, level): the first-UIP clause learned from conflict,
+        asserting literal first, and the level to backtrack to.
+        """
+        seen = set()
+        learned = [None]
+        current = len(self.trail_limits)
+        pending = 0
+        position = len(self.trail) - 1
+        literal = None
+        clause = conflict
+
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.level[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.level[variable] == current:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # walk back to the next literal of this level in the conflict
+            while abs(self.trail[position]) not in seen:
+                position -= 1
+            literal = self.trail[position]
+            position -= 1
+            clause = self.reason[abs(literal)]
+            pending -= 1
+            if pending == 0:
+                break
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+
+        # watch the literal from the highest remaining level second
+        highest = max(range(1, len(learned)),
+                      key=lambda n: self.level[abs(learned[n])])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, self.level[abs(learned[1])]
+
+    def bump(self, variable):
+        """Raises the activity of variable, rescaling when it grows large."""
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.variables + 1)]
+            heapq.heapify(self.order)
+        elif self.value[variable] is None:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """Undoes every assignment above level."""
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phase[variable] = literal > 0
+            self.value[variable] = None
+            self.reason[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+        # drop stale heap entries once they outnumber the variables
+        if len(self.order) > 4 * self.variables + 64:
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.variables + 1)
+                          if self.value[v] is None]
+            heapq.heapify(self.order)
+
+    def decide(self):
+        """Returns the unassigned variable with the highest activity, or None."""
+        while self.order:
+            _, variable = heapq.heappop(self.order)
+            if self.value[variable] is None:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses, with every literal in assumptions true,
+        are satisfiable, leaving a satisfying assignment in self.model.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        for literal in assumptions:
+            self.reserve(abs(literal))
+
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+
+        restart = 100
+        conflicts = 0
+
+        while True:
+            conflict = self.propagate()
+
+            if conflict is not None:
+                self.conflicts += 1
+                conflicts += 1
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                if len(learned) == 1:
+                    self.assign(learned[0], None)
+                else:
+                    self.learned.append(learned)
+                    self.watch(learned)
+                    self.assign(learned[0], learned)
+                self.increment /= 0.95
+                continue
+
+            if conflicts >= restart:
+                conflicts = 0
+                restart = int(restart * 1.5)
+                self.backtrack(0)
+                continue
+
+            # assumptions are the first decisions, one level each
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.literal_value(literal)
+                if value is False:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value is None:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.decide()
+            if variable is None:
+                self.model = list(self.value)
+                self.backtrack(0)
+                return True
+
+            self.decisions += 1
+            self.trail_limits.append(len(self.trail))
+            literal = variable if self.phase[variable] else -variable
+            self.assign(literal, None)